@@ -0,0 +1 @@
+"""Benchmarks of the Wakatime integration against a local fake API."""
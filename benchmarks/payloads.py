@@ -0,0 +1,287 @@
+"""
+Synthetic, deterministic Wakatime API payloads for benchmarks.
+
+Every payload is derived from a seed, the profile and the requested dates
+only, so the fake server answers identical requests with identical bodies
+and conditional requests behave like they do against the real API.
+"""
+
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Any
+
+
+@dataclass(frozen=True, slots=True)
+class Profile:
+    """Size of a synthetic account."""
+
+    projects: int
+    languages: int
+    editors: int
+    operating_systems: int
+    categories: int
+    # Share of days with coding activity and coding hours on those days.
+    active_ratio: float
+    hours_per_day: float
+    # Durations per active day (each one becomes an entry of durations).
+    sessions_per_day: int
+
+
+PROFILES: dict[str, Profile] = {
+    "light": Profile(3, 3, 1, 1, 1, 0.4, 1.0, 4),
+    "medium": Profile(25, 10, 2, 2, 3, 0.7, 4.0, 30),
+    "heavy": Profile(200, 40, 4, 3, 5, 0.9, 7.0, 120),
+    "extreme": Profile(1000, 100, 6, 3, 6, 1.0, 10.0, 400),
+}
+
+LANGUAGES = (
+    "Python",
+    "TypeScript",
+    "JavaScript",
+    "YAML",
+    "Markdown",
+    "JSON",
+    "Rust",
+    "Go",
+    "Bash",
+    "HTML",
+    "CSS",
+    "SQL",
+)
+EDITORS = ("VS Code", "PyCharm", "Vim", "Neovim", "Emacs", "Zed")
+OPERATING_SYSTEMS = ("Linux", "Mac", "Windows")
+CATEGORIES = (
+    "coding",
+    "debugging",
+    "building",
+    "code reviewing",
+    "writing docs",
+    "browsing",
+)
+
+
+def _names(prefix: str, known: tuple[str, ...], count: int) -> list[str]:
+    """Return count names, real ones first and then numbered ones."""
+    return [
+        known[index] if index < len(known) else f"{prefix} {index}"
+        for index in range(count)
+    ]
+
+
+def _text(seconds: float) -> str:
+    hours, minutes = divmod(int(seconds) // 60, 60)
+    return f"{hours} hrs {minutes} mins" if hours else f"{minutes} mins"
+
+
+def _ranked(names: list[str], total: float, rng: random.Random) -> list[dict]:
+    """Split total over names with a long-tailed distribution, like real stats."""
+    weights = [rng.paretovariate(1.2) for _ in names]
+    weight_sum = sum(weights) or 1
+    items = []
+    for name, weight in zip(names, weights, strict=True):
+        seconds = total * weight / weight_sum
+        items.append(
+            {
+                "name": name,
+                "total_seconds": round(seconds, 3),
+                "percent": round(seconds * 100 / total, 2) if total else 0,
+                "digital": f"{int(seconds // 3600)}:{int(seconds % 3600 // 60):02}",
+                "text": _text(seconds),
+                "hours": int(seconds // 3600),
+                "minutes": int(seconds % 3600 // 60),
+            }
+        )
+    items.sort(key=lambda item: item["total_seconds"], reverse=True)
+    return items
+
+
+class PayloadGenerator:
+    """Build the responses of the users/current endpoints for one account."""
+
+    def __init__(self, profile: Profile, seed: int = 0) -> None:
+        """Initialize the generator."""
+        self.profile = profile
+        self.seed = seed
+        self.projects = _names("project", (), profile.projects)
+        self.languages = _names("language", LANGUAGES, profile.languages)
+        self.editors = _names("editor", EDITORS, profile.editors)
+        self.operating_systems = _names(
+            "os", OPERATING_SYSTEMS, profile.operating_systems
+        )
+        self.categories = _names("category", CATEGORIES, profile.categories)
+
+    def _rng(self, *key: Any) -> random.Random:
+        return random.Random(f"{self.seed}|{'|'.join(map(str, key))}")
+
+    def day_seconds(self, day: date) -> float:
+        """Return the coding time of a day."""
+        rng = self._rng("day", day)
+        if rng.random() > self.profile.active_ratio:
+            return 0.0
+        return rng.uniform(0.3, 1.7) * self.profile.hours_per_day * 3600
+
+    def user(self) -> dict:
+        """Return users/current."""
+        return {
+            "data": {
+                "id": f"00000000-0000-0000-0000-{self.seed:012d}",
+                "email": f"bench{self.seed}@example.com",
+                "username": f"bench{self.seed}",
+                "display_name": f"Benchmark {self.seed}",
+                "full_name": f"Benchmark User {self.seed}",
+                "timezone": "UTC",
+                "plan": "premium",
+                "photo": "https://example.com/photo.png",
+                "created_at": "2020-01-01T00:00:00Z",
+            }
+        }
+
+    def stats(self, today: date) -> dict:
+        """Return users/current/stats for the last 7 days."""
+        days = [today - timedelta(days=offset) for offset in range(7)]
+        total = sum(self.day_seconds(day) for day in days)
+        rng = self._rng("stats", today)
+        best_day = max(days, key=self.day_seconds)
+        return {
+            "data": {
+                "total_seconds": total,
+                "daily_average": total / 7,
+                "human_readable_total": _text(total),
+                "range": "last_7_days",
+                "languages": _ranked(self.languages, total, rng),
+                "projects": _ranked(self.projects, total, rng),
+                "editors": _ranked(self.editors, total, rng),
+                "operating_systems": _ranked(self.operating_systems, total, rng),
+                "categories": _ranked(self.categories, total, rng),
+                "machines": _ranked(["workstation", "laptop"], total, rng),
+                "dependencies": _ranked(
+                    [f"dependency {index}" for index in range(50)], total, rng
+                ),
+                "best_day": {
+                    "date": best_day.isoformat(),
+                    "total_seconds": self.day_seconds(best_day),
+                    "text": _text(self.day_seconds(best_day)),
+                    "time": f"{rng.randint(8, 22):02}:00",
+                },
+            }
+        }
+
+    def native_summary(self, today: date) -> dict:
+        """Return Wakapi's native summary of the last 7 days."""
+        stats = self.stats(today)["data"]
+        return {
+            "from": (today - timedelta(days=6)).isoformat(),
+            "to": today.isoformat(),
+            **{
+                dimension: [
+                    {"key": item["name"], "total": round(item["total_seconds"])}
+                    for item in stats[dimension]
+                ]
+                for dimension in (
+                    "languages",
+                    "projects",
+                    "editors",
+                    "operating_systems",
+                    "categories",
+                    "machines",
+                )
+            },
+        }
+
+    def all_time(self, today: date) -> dict:
+        """Return users/current/all_time_since_today."""
+        days = [today - timedelta(days=offset) for offset in range(365)]
+        totals = [self.day_seconds(day) for day in days]
+        streak = 0
+        for seconds in totals:
+            if not seconds:
+                break
+            streak += 1
+        return {
+            "data": {
+                "total_seconds": sum(totals),
+                "text": _text(sum(totals)),
+                "daily_average": sum(totals) / len(totals),
+                "current_streak": streak,
+                "best_streak": max(streak, 1),
+                "best_streak_range": [days[-1].isoformat(), today.isoformat()],
+                "is_up_to_date": True,
+            }
+        }
+
+    def summary_day(self, day: date) -> dict:
+        """Return one day of users/current/summaries."""
+        total = self.day_seconds(day)
+        rng = self._rng("summary", day)
+        # Only part of the projects are touched on a given day.
+        projects = rng.sample(self.projects, max(1, len(self.projects) // 4))
+        return {
+            "grand_total": {
+                "total_seconds": total,
+                "text": _text(total),
+                "digital": f"{int(total // 3600)}:{int(total % 3600 // 60):02}",
+                "hours": int(total // 3600),
+                "minutes": int(total % 3600 // 60),
+            },
+            "range": {
+                "date": day.isoformat(),
+                "start": f"{day.isoformat()}T00:00:00Z",
+                "end": f"{day.isoformat()}T23:59:59Z",
+                "text": day.strftime("%a %b %d %Y"),
+                "timezone": "UTC",
+            },
+            "projects": _ranked(projects, total, rng),
+            "languages": _ranked(self.languages, total, rng),
+            "editors": _ranked(self.editors, total, rng),
+            "operating_systems": _ranked(self.operating_systems, total, rng),
+            "categories": _ranked(self.categories, total, rng),
+            "entities": _ranked(
+                [
+                    f"/src/{project}/module_{index}.py"
+                    for project in projects[:10]
+                    for index in range(5)
+                ],
+                total,
+                rng,
+            ),
+        }
+
+    def summaries(self, start: date, end: date) -> dict:
+        """Return users/current/summaries between start and end inclusive."""
+        data = [
+            self.summary_day(start + timedelta(days=offset))
+            for offset in range((end - start).days + 1)
+        ]
+        total = sum(day["grand_total"]["total_seconds"] for day in data)
+        return {
+            "data": data,
+            "cumulative_total": {"seconds": total, "text": _text(total)},
+            "start": f"{start.isoformat()}T00:00:00Z",
+            "end": f"{end.isoformat()}T23:59:59Z",
+        }
+
+    def durations(self, day: date) -> dict:
+        """Return users/current/durations of a day."""
+        total = self.day_seconds(day)
+        rng = self._rng("durations", day)
+        sessions = self.profile.sessions_per_day if total else 0
+        midnight = datetime.combine(day, time()).timestamp()
+        length = total / sessions if sessions else 0
+        data = [
+            {
+                "project": rng.choice(self.projects),
+                "time": midnight + 8 * 3600 + index * (length + 60),
+                "duration": length,
+                "color": None,
+            }
+            for index in range(sessions)
+        ]
+        return {
+            "data": data,
+            "start": f"{day.isoformat()}T00:00:00Z",
+            "end": f"{day.isoformat()}T23:59:59Z",
+            "timezone": "UTC",
+        }
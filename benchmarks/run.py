@@ -0,0 +1,356 @@
+"""
+Benchmark coordinator refreshes against the fake Wakatime server.
+
+For every profile and scenario the fake server is started in its own
+process (so its CPU time is not counted) and a coordinator with the real
+client, history and snapshot is refreshed repeatedly:
+
+- the first refresh is cold and timed together with the history backfill
+  that follows it at setup;
+- the following ones are warm, with every endpoint forced due.
+
+Each refresh records wall time, CPU time of this process (including the
+executor threads), requests sent, bytes received and decoded, peak Python
+memory (tracemalloc, which also slows every refresh by a constant factor)
+and the state writes the built-in entities would make.
+
+Results are appended to benchmarks/results.jsonl together with the
+integration version and git commit; --compare prints the latest run of
+each profile and scenario next to the previous one.
+
+Requires the development requirements (Home Assistant and aiohttp):
+
+    python -m benchmarks.run --profile light heavy extreme
+    python -m benchmarks.run --compare
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import aiohttp
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import EntityPlatform
+
+from custom_components.wakatime import WakatimeDataUpdateCoordinator
+from custom_components.wakatime.api import WakapiApiClient, WakatimeApiClient
+from custom_components.wakatime.binary_sensor import (
+    BINARY_SENSOR_TYPES,
+    WakatimeBinarySensor,
+)
+from custom_components.wakatime.const import DATASET_INTERVALS, DOMAIN
+from custom_components.wakatime.history import WakatimeHistory
+from custom_components.wakatime.ratelimit import RateLimiter
+from custom_components.wakatime.sensor import SENSOR_TYPES, WakatimeSensor
+from custom_components.wakatime.transport import (
+    async_get_session,
+    async_release_session,
+)
+
+from .payloads import PROFILES
+
+ROOT = Path(__file__).parent
+RESULTS = ROOT / "results.jsonl"
+MANIFEST = ROOT.parent / "custom_components" / "wakatime" / "manifest.json"
+
+# Fake server options of each scenario.
+SCENARIOS: dict[str, list[str]] = {
+    "baseline": [],
+    "latency": ["--latency", "0.05", "--jitter", "0.05"],
+    "faults": ["--error-rate", "0.05", "--throttle-rate", "0.05"],
+    "no_etags": ["--no-etags"],
+}
+METRICS = ("wall", "cpu", "requests", "bytes", "peak_memory", "writes")
+
+
+class _FakeWakatimeApiClient(WakatimeApiClient):
+    """The Wakatime client, sent to the fake server instead of wakatime.com."""
+
+    def _prepare_auth_and_url(self, api_key: str, base_url: str) -> tuple[str, str]:
+        # Any host but wakatime.com would be treated as a Wakapi server.
+        return api_key, base_url
+
+
+# Client class and base path of each backend on the fake server.
+BACKENDS: dict[str, tuple[type[WakatimeApiClient], str]] = {
+    "wakatime": (_FakeWakatimeApiClient, "/api/v1"),
+    "wakapi": (WakapiApiClient, "/api/compat/wakatime/v1"),
+}
+
+
+def _counting(entity_class: type) -> type:
+    """Return a subclass of an entity class that counts state writes."""
+
+    class CountingEntity(entity_class):
+        writes = 0
+
+        def async_write_ha_state(self) -> None:
+            self.writes += 1
+
+    return CountingEntity
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],  # noqa: S607
+            capture_output=True,
+            check=True,
+            cwd=ROOT,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def _server_stats(session: aiohttp.ClientSession, origin: str) -> dict:
+    async with session.get(f"{origin}/_stats") as response:
+        return await response.json()
+
+
+async def _wait_for_server(session: aiohttp.ClientSession, origin: str) -> None:
+    for _ in range(100):
+        try:
+            await _server_stats(session, origin)
+        except aiohttp.ClientError:
+            await asyncio.sleep(0.05)
+        else:
+            return
+    msg = f"Fake server did not start at {origin}"
+    raise RuntimeError(msg)
+
+
+async def _benchmark(
+    profile: str, scenario: str, backend: str, refreshes: int, config_dir: str
+) -> list[dict[str, Any]]:
+    """Run one profile and scenario, returning the metrics of each refresh."""
+    port = _free_port()
+    origin = f"http://127.0.0.1:{port}"
+    server = await asyncio.create_subprocess_exec(
+        sys.executable,
+        "-m",
+        "benchmarks.server",
+        "--port",
+        str(port),
+        "--profile",
+        profile,
+        *SCENARIOS[scenario],
+        cwd=ROOT.parent,
+    )
+    hass = HomeAssistant(config_dir)
+    session = aiohttp.ClientSession()
+    history = WakatimeHistory(hass, str(Path(config_dir) / f"{profile}.db"))
+    try:
+        await _wait_for_server(session, origin)
+        await history.async_setup()
+        client_class, path = BACKENDS[backend]
+        client = client_class(
+            "benchmark",
+            # The integration's pooled session; session only talks to the
+            # server's control endpoints.
+            async_get_session(hass, origin, "benchmark"),
+            base_url=f"{origin}{path}",
+            # Measure the integration, not the production request budget.
+            rate_limiter=RateLimiter(1000, 1000),
+        )
+        coordinator = WakatimeDataUpdateCoordinator(hass, client, history)
+        entities = [
+            _counting(entity_class)(
+                coordinator=coordinator,
+                entity_description=description,
+                entry_id="benchmark",
+            )
+            for entity_class, descriptions in (
+                (WakatimeSensor, SENSOR_TYPES),
+                (WakatimeBinarySensor, BINARY_SENSOR_TYPES),
+            )
+            for description in descriptions
+        ]
+        # Entities read their platform for translated units; give them one
+        # without adding them, so state writes are only counted.
+        platforms = {
+            domain: EntityPlatform(
+                hass=hass,
+                logger=logging.getLogger(__name__),
+                domain=domain,
+                platform_name=DOMAIN,
+                platform=None,
+                scan_interval=DATASET_INTERVALS["summaries"],
+                entity_namespace=None,
+            )
+            for domain in ("sensor", "binary_sensor")
+        }
+        for entity in entities:
+            domain = (
+                "binary_sensor"
+                if isinstance(entity, WakatimeBinarySensor)
+                else "sensor"
+            )
+            entity.add_to_platform_start(hass, platforms[domain], None)
+        # There is no entity registry here; treat every entity as enabled.
+        coordinator.entity_datasets.clear()
+
+        results = []
+        tracemalloc.start()
+        for _ in range(refreshes):
+            # Force every endpoint due, like a refresh after a long pause.
+            coordinator._schedule = [  # noqa: SLF001
+                (0.0, endpoint) for endpoint in DATASET_INTERVALS
+            ]
+            # Refreshes run back to back; do not answer them from the
+            # client's short-lived result cache.
+            client._recent.clear()  # noqa: SLF001
+            async with session.post(f"{origin}/_reset"):
+                pass
+            writes = sum(entity.writes for entity in entities)
+            tracemalloc.reset_peak()
+            wall, cpu = time.perf_counter(), time.process_time()
+
+            await coordinator.async_refresh()
+            if not results:
+                await coordinator.async_backfill()
+            # Entities listen to the coordinator; call them like it would.
+            for entity in entities:
+                entity._handle_coordinator_update()  # noqa: SLF001
+
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            peak = tracemalloc.get_traced_memory()[1]
+            stats = await _server_stats(session, origin)
+            results.append(
+                {
+                    "wall": wall,
+                    "cpu": cpu,
+                    "requests": stats["requests"],
+                    "bytes": stats["bytes_sent"],
+                    "peak_memory": peak,
+                    "writes": sum(entity.writes for entity in entities) - writes,
+                    "success": coordinator.last_update_success,
+                }
+            )
+        tracemalloc.stop()
+        for entity in entities:
+            if isinstance(entity, WakatimeBinarySensor):
+                entity._cancel_expire()  # noqa: SLF001
+        return results
+    finally:
+        await history.async_close()
+        await async_release_session(hass, origin, "benchmark")
+        await session.close()
+        await hass.async_stop(force=True)
+        server.terminate()
+        await server.wait()
+
+
+def _summarize(refreshes: list[dict[str, Any]]) -> dict[str, Any]:
+    """Return the cold refresh and the median of the warm refreshes."""
+    summary: dict[str, Any] = {"cold": refreshes[0]}
+    if warm := refreshes[1:]:
+        summary["warm"] = {
+            metric: statistics.median(refresh[metric] for refresh in warm)
+            for metric in METRICS
+        }
+        summary["warm"]["failures"] = sum(not refresh["success"] for refresh in warm)
+    return summary
+
+
+def _format(metric: str, value: float) -> str:
+    if metric in ("wall", "cpu"):
+        return f"{value * 1000:.1f} ms"
+    if metric in ("bytes", "peak_memory"):
+        return f"{value / 1024:.1f} KiB"
+    return f"{value:g}"
+
+
+def _compare() -> None:
+    """Print the latest run of every benchmark next to the previous one."""
+    runs: dict[tuple[str, str, str], list[dict]] = {}
+    for line in RESULTS.read_text().splitlines():
+        run = json.loads(line)
+        runs.setdefault((run["profile"], run["scenario"], run["backend"]), []).append(
+            run
+        )
+
+    for (profile, scenario, backend), history in sorted(runs.items()):
+        latest = history[-1]
+        previous = history[-2] if len(history) > 1 else None
+        print(
+            f"\n{profile} / {scenario} / {backend}: {latest['version']} "
+            f"({latest['commit']})"
+            + (f" vs {previous['version']} ({previous['commit']})" if previous else "")
+        )
+        for phase in ("cold", "warm"):
+            if phase not in latest:
+                continue
+            for metric in METRICS:
+                value = latest[phase][metric]
+                line = f"  {phase:4} {metric:12} {_format(metric, value):>14}"
+                if previous and phase in previous:
+                    before = previous[phase][metric]
+                    change = (value - before) / before * 100 if before else 0.0
+                    line += f"  {_format(metric, before):>14}  {change:+6.1f}%"
+                print(line)
+
+
+async def _run(args: argparse.Namespace) -> None:
+    version = json.loads(MANIFEST.read_text())["version"]
+    commit = _commit()
+    with tempfile.TemporaryDirectory() as config_dir:
+        for profile in args.profile:
+            for scenario in args.scenario:
+                refreshes = await _benchmark(
+                    profile, scenario, args.backend, args.refreshes, config_dir
+                )
+                run = {
+                    "version": version,
+                    "commit": commit,
+                    "timestamp": datetime.now(UTC).isoformat(),
+                    "profile": profile,
+                    "scenario": scenario,
+                    "backend": args.backend,
+                    **_summarize(refreshes),
+                }
+                with RESULTS.open("a") as results:
+                    results.write(json.dumps(run) + "\n")
+                print(f"{profile} / {scenario}: {json.dumps(run['cold'])}")
+
+
+def main() -> None:
+    """Run the benchmarks from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profile", nargs="+", choices=PROFILES, default=["medium"])
+    parser.add_argument(
+        "--scenario", nargs="+", choices=SCENARIOS, default=["baseline"]
+    )
+    parser.add_argument("--backend", choices=BACKENDS, default="wakatime")
+    parser.add_argument("--refreshes", type=int, default=6)
+    parser.add_argument("--compare", action="store_true")
+    args = parser.parse_args()
+
+    if args.compare:
+        _compare()
+        return
+    asyncio.run(_run(args))
+    _compare()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Local stand-in for the Wakatime API and Wakapi's Wakatime-compatible API.
+
+Serves the users/current endpoints the integration polls, both under
+/api/v1 (Wakatime) and /api/compat/wakatime/v1 (Wakapi), plus Wakapi's
+native /api/summary, from a PayloadGenerator. Latency, server errors and
+throttling can be injected, and every response carries an ETag so
+conditional requests get a 304 when the payload did not change.
+
+Counters of requests and bytes sent are served at /_stats, so a benchmark
+running the server in another process can read them.
+
+Run standalone with:
+
+    python -m benchmarks.server --profile heavy --port 8765
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import UTC, date, datetime
+
+from aiohttp import hdrs, web
+
+from .payloads import PROFILES, PayloadGenerator
+
+PREFIXES = ("/api/v1", "/api/compat/wakatime/v1")
+
+
+def _today() -> date:
+    """Return the local date, which the coordinator asks for as today."""
+    return datetime.now(UTC).astimezone().date()
+
+
+@dataclass(slots=True)
+class ServerOptions:
+    """Faults injected by the fake server."""
+
+    # Seconds added to every response, plus up to jitter seconds at random.
+    latency: float = 0.0
+    jitter: float = 0.0
+    # Share of requests answered with 503 and with 429.
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    retry_after: int = 1
+    # Honor If-None-Match with 304 responses.
+    etags: bool = True
+    seed: int = 0
+
+
+@dataclass(slots=True)
+class ServerStats:
+    """Counters of everything the server answered."""
+
+    requests: int = 0
+    bytes_sent: int = 0
+    statuses: Counter = field(default_factory=Counter)
+    endpoints: Counter = field(default_factory=Counter)
+
+    def as_dict(self) -> dict:
+        """Return the counters as JSON serializable data."""
+        return {
+            "requests": self.requests,
+            "bytes_sent": self.bytes_sent,
+            "statuses": {str(status): count for status, count in self.statuses.items()},
+            "endpoints": dict(self.endpoints),
+        }
+
+
+class FakeWakatimeServer:
+    """aiohttp application answering like the Wakatime API."""
+
+    def __init__(
+        self, generator: PayloadGenerator, options: ServerOptions | None = None
+    ) -> None:
+        """Initialize the server."""
+        self.generator = generator
+        self.options = options or ServerOptions()
+        self.stats = ServerStats()
+        self._rng = random.Random(self.options.seed)
+
+    def make_app(self) -> web.Application:
+        """Return the aiohttp application."""
+        app = web.Application()
+        for prefix in PREFIXES:
+            app.router.add_get(f"{prefix}/users/current", self._user)
+            app.router.add_get(f"{prefix}/users/current/stats", self._stats)
+            app.router.add_get(f"{prefix}/users/current/stats/{{range}}", self._stats)
+            app.router.add_get(
+                f"{prefix}/users/current/all_time_since_today", self._all_time
+            )
+            app.router.add_get(f"{prefix}/users/current/summaries", self._summaries)
+            app.router.add_get(f"{prefix}/users/current/durations", self._durations)
+            app.router.add_post(
+                f"{prefix}/users/current/heartbeats.bulk", self._heartbeats
+            )
+        app.router.add_get("/api/summary", self._native_summary)
+        app.router.add_get("/_stats", self._get_stats)
+        app.router.add_post("/_reset", self._reset)
+        return app
+
+    async def _respond(self, request: web.Request, payload: dict) -> web.Response:
+        """Apply the injected faults, then answer with payload or 304."""
+        options = self.options
+        self.stats.requests += 1
+        self.stats.endpoints[request.path.rsplit("/v1/", 1)[-1]] += 1
+        if options.latency or options.jitter:
+            await asyncio.sleep(options.latency + self._rng.uniform(0, options.jitter))
+
+        roll = self._rng.random()
+        if roll < options.throttle_rate:
+            return self._count(
+                web.json_response(
+                    {"error": "Too many requests"},
+                    status=429,
+                    headers={hdrs.RETRY_AFTER: str(options.retry_after)},
+                )
+            )
+        if roll < options.throttle_rate + options.error_rate:
+            return self._count(web.json_response({"error": "Unavailable"}, status=503))
+
+        body = json.dumps(payload).encode()
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'  # noqa: S324
+        if options.etags and request.headers.get(hdrs.IF_NONE_MATCH) == etag:
+            return self._count(web.Response(status=304, headers={hdrs.ETAG: etag}))
+        return self._count(
+            web.Response(
+                body=body,
+                content_type="application/json",
+                headers={hdrs.ETAG: etag},
+            )
+        )
+
+    def _count(self, response: web.Response) -> web.Response:
+        self.stats.statuses[response.status] += 1
+        self.stats.bytes_sent += len(response.body or b"")
+        return response
+
+    async def _user(self, request: web.Request) -> web.Response:
+        return await self._respond(request, self.generator.user())
+
+    async def _stats(self, request: web.Request) -> web.Response:
+        return await self._respond(request, self.generator.stats(_today()))
+
+    async def _native_summary(self, request: web.Request) -> web.Response:
+        return await self._respond(request, self.generator.native_summary(_today()))
+
+    async def _all_time(self, request: web.Request) -> web.Response:
+        return await self._respond(request, self.generator.all_time(_today()))
+
+    async def _summaries(self, request: web.Request) -> web.Response:
+        start = date.fromisoformat(request.query["start"])
+        end = date.fromisoformat(request.query["end"])
+        return await self._respond(request, self.generator.summaries(start, end))
+
+    async def _durations(self, request: web.Request) -> web.Response:
+        day = date.fromisoformat(request.query.get("date", _today().isoformat()))
+        return await self._respond(request, self.generator.durations(day))
+
+    async def _heartbeats(self, request: web.Request) -> web.Response:
+        heartbeats = await request.json()
+        self.stats.requests += 1
+        self.stats.endpoints["users/current/heartbeats.bulk"] += 1
+        return self._count(
+            web.json_response(
+                {"responses": [[{"data": hb}, 201] for hb in heartbeats]},
+                status=202,
+            )
+        )
+
+    async def _get_stats(self, _request: web.Request) -> web.Response:
+        return web.json_response(self.stats.as_dict())
+
+    async def _reset(self, _request: web.Request) -> web.Response:
+        self.stats = ServerStats()
+        return web.json_response({})
+
+
+def main() -> None:
+    """Run the fake server from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--profile", choices=PROFILES, default="medium")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--no-etags", dest="etags", action="store_false")
+    args = parser.parse_args()
+
+    server = FakeWakatimeServer(
+        PayloadGenerator(PROFILES[args.profile], args.seed),
+        ServerOptions(
+            latency=args.latency,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            throttle_rate=args.throttle_rate,
+            retry_after=args.retry_after,
+            etags=args.etags,
+            seed=args.seed,
+        ),
+    )
+    web.run_app(server.make_app(), host=args.host, port=args.port, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
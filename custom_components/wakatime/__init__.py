@@ -2,82 +2,878 @@
 
 from __future__ import annotations
 
+import asyncio
+import heapq
 import logging
-from datetime import timedelta
+import time
+from datetime import date, timedelta
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
 import async_timeout
 import voluptuous as vol
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_API_KEY, Platform
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.device_registry import DeviceEntryType
+from homeassistant.helpers.storage import STORAGE_DIR, Store
+from homeassistant.helpers.typing import ConfigType
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
 
-from .api import WakatimeApiClient
-from .const import DOMAIN, SCAN_INTERVAL, CONF_BASE_URL
+from .api import WakatimeApiClient, create_api_client
+from .const import (
+    ACTIVITY_DATASETS,
+    ATTR_CONFIG_ENTRY_ID,
+    ATTR_DIMENSION,
+    ATTR_END,
+    ATTR_FILTER,
+    ATTR_LIMIT,
+    ATTR_START,
+    CONF_BASE_URL,
+    CONF_MAX_STALENESS,
+    CONF_POLL_CEILING,
+    CONF_POLL_FLOOR,
+    CONF_PROFILE,
+    CONF_ROLLING_WINDOWS,
+    DATASET_ENDPOINTS,
+    DATASET_INTERVALS,
+    DEFAULT_MAX_STALENESS,
+    DEFAULT_POLL_CEILING,
+    DEFAULT_POLL_FLOOR,
+    DOMAIN,
+    ENDPOINT_TIMEOUT,
+    HEARTBEAT_TIMEOUT,
+    HISTORY_DAYS,
+    PROFILE_ENDPOINTS,
+    PROFILE_FULL,
+    QUERY_DEFAULT_LIMIT,
+    QUERY_MAX_LIMIT,
+    QUERY_RECENT_TTL,
+    SERVICE_QUERY,
+    STORAGE_SAVE_DELAY,
+    STORAGE_VERSION,
+    SUMMARY_WINDOWS,
+)
+from .external_statistics import StatisticsImporter
+from .heartbeat import HeartbeatTracker, WakatimeHeartbeatView
+from .history import WakatimeHistory
+from .models import STATS_DIMENSIONS, DaySummary
+from .query import QueryCache, QueryKey
+from .ratelimit import get_rate_limiter
+from .rolling import DailySeries
+from .scheduler import WakatimeScheduler, account_key, get_scheduler
+from .snapshot import WakatimeSnapshot
+from .transport import async_get_session, async_release_session
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
 
 _LOGGER = logging.getLogger(__name__)
 
-PLATFORMS = [Platform.SENSOR]
+PLATFORMS = [Platform.BINARY_SENSOR, Platform.SENSOR]
+
+DATA_HEARTBEAT_VIEW = f"{DOMAIN}_heartbeat_view"
+
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+def _ordered_range(data: dict[str, Any]) -> dict[str, Any]:
+    """Reject a query range that ends before it starts."""
+    if ATTR_END in data and data[ATTR_END] < data[ATTR_START]:
+        msg = "end must not be before start"
+        raise vol.Invalid(msg)
+    return data
+
+
+QUERY_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+            vol.Required(ATTR_START): cv.date,
+            vol.Optional(ATTR_END): cv.date,
+            vol.Optional(ATTR_DIMENSION): vol.In(STATS_DIMENSIONS),
+            vol.Optional(ATTR_FILTER): cv.string,
+            vol.Optional(ATTR_LIMIT, default=QUERY_DEFAULT_LIMIT): vol.All(
+                vol.Coerce(int), vol.Range(min=1, max=QUERY_MAX_LIMIT)
+            ),
+        }
+    ),
+    _ordered_range,
+)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:  # noqa: ARG001
+    """Register the query service."""
+
+    async def _async_query(call: ServiceCall) -> ServiceResponse:
+        coordinators: dict[str, WakatimeDataUpdateCoordinator] = hass.data.get(
+            DOMAIN, {}
+        )
+        if (entry_id := call.data.get(ATTR_CONFIG_ENTRY_ID)) is None:
+            if len(coordinators) != 1:
+                raise ServiceValidationError(
+                    translation_domain=DOMAIN,
+                    translation_key="config_entry_required",
+                )
+            coordinator = next(iter(coordinators.values()))
+        elif (coordinator := coordinators.get(entry_id)) is None:
+            raise ServiceValidationError(
+                translation_domain=DOMAIN,
+                translation_key="config_entry_not_found",
+                translation_placeholders={"entry_id": entry_id},
+            )
+
+        today = dt_util.now().date()
+        start = call.data[ATTR_START]
+        end = min(call.data.get(ATTR_END, today), today)
+        if start > end:
+            raise ServiceValidationError(
+                translation_domain=DOMAIN,
+                translation_key="invalid_range",
+                translation_placeholders={"start": str(start), "end": str(end)},
+            )
+        if (end - start).days >= HISTORY_DAYS:
+            raise ServiceValidationError(
+                translation_domain=DOMAIN,
+                translation_key="range_too_long",
+                translation_placeholders={"days": str(HISTORY_DAYS)},
+            )
+        dimension = call.data.get(ATTR_DIMENSION)
+        if ATTR_FILTER in call.data and dimension is None:
+            raise ServiceValidationError(
+                translation_domain=DOMAIN,
+                translation_key="filter_without_dimension",
+            )
+        return await coordinator.async_query(
+            QueryKey(
+                start, end, dimension, call.data.get(ATTR_FILTER), call.data[ATTR_LIMIT]
+            )
+        )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_QUERY,
+        _async_query,
+        schema=QUERY_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    return True
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Wakatime from a config entry."""
     api_key = entry.data[CONF_API_KEY]
     base_url = entry.data.get(CONF_BASE_URL, "https://wakatime.com/api/v1")
-    session = async_get_clientsession(hass)
-    client = WakatimeApiClient(api_key, session, base_url=base_url)
+    key = account_key(api_key, base_url)
+
+    # One pooled session per host, kept while an account uses it.
+    session = async_get_session(hass, base_url, key)
+    client = create_api_client(
+        api_key,
+        session,
+        base_url=base_url,
+        rate_limiter=get_rate_limiter(hass, base_url),
+    )
 
-    coordinator = WakatimeDataUpdateCoordinator(hass, client=client)
-    await coordinator.async_config_entry_first_refresh()
+    history = WakatimeHistory(hass, hass.config.path(STORAGE_DIR, f"{DOMAIN}.{key}.db"))
+    await history.async_setup()
+    coordinator = WakatimeDataUpdateCoordinator(
+        hass, client, history, key, config_entry=entry
+    )
+    restored = await coordinator.async_restore_snapshot()
+    if not restored:
+        try:
+            await coordinator.async_config_entry_first_refresh()
+        except Exception:
+            await coordinator.async_shutdown()
+            await async_release_session(hass, base_url, key)
+            raise
 
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = coordinator
 
+    if not hass.data.get(DATA_HEARTBEAT_VIEW):
+        hass.http.register_view(WakatimeHeartbeatView())
+        hass.data[DATA_HEARTBEAT_VIEW] = True
+
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
+
+    if restored:
+        # Entities start from the stored snapshot; fetch fresh data behind
+        # them once they told the coordinator which datasets they read.
+        entry.async_create_background_task(
+            hass, coordinator.async_refresh(), f"{DOMAIN} refresh {entry.entry_id}"
+        )
+    # Refreshes only sync today and yesterday; older days are fetched behind
+    # the entities instead of delaying the setup.
+    coordinator.async_start_backfill()
 
     return True
 
 
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the entry when its options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        coordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        await coordinator.async_shutdown()
+        await async_release_session(
+            hass,
+            entry.data.get(CONF_BASE_URL, "https://wakatime.com/api/v1"),
+            coordinator.key,
+        )
 
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the stored snapshot and history of the entry's account."""
+    key = account_key(
+        entry.data[CONF_API_KEY],
+        entry.data.get(CONF_BASE_URL, "https://wakatime.com/api/v1"),
+    )
+    await Store(hass, STORAGE_VERSION, f"{DOMAIN}.{key}").async_remove()
+    await hass.async_add_executor_job(
+        partial(
+            Path(hass.config.path(STORAGE_DIR, f"{DOMAIN}.{key}.db")).unlink,
+            missing_ok=True,
+        )
+    )
+
+
+async def async_migrate_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Migrate an old config entry."""
+    if entry.version > 1:
+        return False
+
+    if entry.minor_version < 2:
+        # Sensor unique IDs were not scoped to the entry and collided between
+        # accounts; prefix them with the entry ID instead of the domain.
+        @callback
+        def _migrate_unique_id(
+            entity_entry: er.RegistryEntry,
+        ) -> dict[str, Any] | None:
+            if not entity_entry.unique_id.startswith(f"{DOMAIN}_"):
+                return None
+            sensor_key = entity_entry.unique_id.removeprefix(f"{DOMAIN}_")
+            return {"new_unique_id": f"{entry.entry_id}_{sensor_key}"}
+
+        await er.async_migrate_entries(hass, entry.entry_id, _migrate_unique_id)
+        hass.config_entries.async_update_entry(entry, minor_version=2)
+
+    return True
+
+
 class WakatimeDataUpdateCoordinator(DataUpdateCoordinator):
-    """Class to manage fetching Wakatime data."""
+    """
+    Class to manage fetching Wakatime data.
+
+    Every endpoint has its own cadence (see DATASET_INTERVALS). A due-time
+    queue tracks when each one must be fetched next; every tick fetches only
+    the due endpoints and merges them into the previous data, and the next
+    tick is scheduled for the earliest due time.
+
+    Regular due times are placed on the scheduler's phase-shifted grid for
+    this account so several accounts do not refresh in lockstep, and every
+    request waits for a slot of the domain-wide semaphore.
+
+    Polling adapts to activity: while the user is coding (per the durations
+    endpoint or local heartbeats) durations are polled at the floor interval;
+    every idle poll doubles the interval up to the ceiling, and no endpoint
+    is polled more often than that interval.
+
+    Daily summaries live in a local WakatimeHistory. The summaries cadence
+    syncs only today and yesterday into it, and the summary windows are read
+    back from it. The older days are backfilled by a background task started
+    at setup, whose days are merged in by the next sync; ranges it failed to
+    fetch are backfilled again after later syncs. Rolling windows are
+    computed from a DailySeries loaded from the history once and then updated
+    with the days each sync changed, and the changed days are imported as
+    long-term statistics in the background when the recorder is loaded.
+    Ad-hoc queries of the query service read the history too and fetch only
+    the days it lacks; their results are kept in a QueryCache.
 
-    def __init__(self, hass: HomeAssistant, client: WakatimeApiClient) -> None:
-        """Initialize."""
+    The last good snapshot is persisted to a Store so entities can be set up
+    from it at startup, flagged as stale, before the first refresh finishes.
+
+    Entities register the dataset they read in entity_datasets. Endpoints
+    whose datasets are only read by entities disabled in the entity registry
+    are skipped; enabling one of them reloads the entry, which fetches the
+    endpoint again. The minimal profile fetches a fixed set of endpoints.
+
+    An endpoint that fails (an error, or an error response yielding no data)
+    keeps serving its last good data until max_staleness past its regular
+    refresh, marked as stale, while it is retried on the shortest cadence
+    behind it. Only then do its entities become unavailable; a max_staleness
+    of 0 makes them unavailable right away. The fetch times are persisted
+    with the snapshot, so data restored at startup ages the same way.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        client: WakatimeApiClient,
+        history: WakatimeHistory,
+        key: str = "",
+        *,
+        config_entry: ConfigEntry | None = None,
+    ) -> None:
+        """
+        Initialize.
+
+        The polling options are read from the config entry, and only the
+        snapshot of an entry is persisted. Accounts without a key (e.g. in
+        benchmarks) get a scheduler of their own.
+        """
+        options = config_entry.options if config_entry is not None else {}
         self.client = client
+        self.key = key
+        self._poll_floor = timedelta(
+            minutes=options.get(CONF_POLL_FLOOR, DEFAULT_POLL_FLOOR)
+        ).total_seconds()
+        self._poll_ceiling = max(
+            timedelta(
+                minutes=options.get(CONF_POLL_CEILING, DEFAULT_POLL_CEILING)
+            ).total_seconds(),
+            self._poll_floor,
+        )
+        self._poll_interval = self._poll_floor
+        self._max_staleness = timedelta(
+            minutes=options.get(CONF_MAX_STALENESS, DEFAULT_MAX_STALENESS)
+        ).total_seconds()
+        # Wall time of the last successful fetch of each endpoint, and the
+        # failed endpoints whose previous data is still served.
+        self.fetched_at: dict[str, float] = {}
+        self.stale_endpoints: set[str] = set()
+        # Datasets without current data whose snapshot values are served.
+        self._kept_datasets: set[str] = set()
+        self._scheduler = get_scheduler(hass) if key else WakatimeScheduler()
+        self._phase = self._scheduler.phase(key) if key else 0.0
+        self.snapshot = WakatimeSnapshot()
+        self.stale = False
+        self.heartbeats = HeartbeatTracker()
+        self._store = (
+            Store(hass, STORAGE_VERSION, f"{DOMAIN}.{key}")
+            if config_entry is not None
+            else None
+        )
+        self.changed_datasets: set[str] = set()
+        self.history = history
+        # Days stored by the backfill that the next sync has to publish.
+        self._backfilled_days: set[date] = set()
+        self._backfill_task: asyncio.Task | None = None
+        self._backfill_failed = False
+        self._statistics = (
+            StatisticsImporter(hass, history, key)
+            if "recorder" in hass.config.components
+            else None
+        )
+        self._statistics_tasks: set[asyncio.Task] = set()
+        self.profile = options.get(CONF_PROFILE, PROFILE_FULL)
+        # Unique ID -> dataset of every entity created for this account.
+        self.entity_datasets: dict[str, str | None] = {}
+        self._windows: dict[str, tuple[date, date]] = {}
+        self._rolling_windows = tuple(
+            sorted(int(days) for days in options.get(CONF_ROLLING_WINDOWS, []))
+        )
+        self.series: DailySeries | None = None
+        self.query_cache = QueryCache()
+        self._schedule: list[tuple[float, str]] = [
+            (0.0, endpoint) for endpoint in DATASET_INTERVALS
+        ]
         super().__init__(
             hass,
             _LOGGER,
+            config_entry=config_entry,
             name=DOMAIN,
-            update_interval=timedelta(minutes=SCAN_INTERVAL),
+            update_interval=min(DATASET_INTERVALS.values()),
+        )
+
+    async def async_restore_snapshot(self) -> bool:
+        """Load the stored snapshot, returning True if one was found."""
+        if self._store is None or not (stored := await self._store.async_load()):
+            return False
+        self.snapshot = WakatimeSnapshot.from_dict(stored)
+        self.fetched_at = dict(stored.get("fetched_at", {}))
+        self._kept_datasets = set(self.snapshot.datasets)
+        self.stale = True
+        return True
+
+    def _stored_data(self) -> dict[str, Any]:
+        """Return the snapshot to persist, with the fetch time of its data."""
+        return {**self.snapshot.as_dict(), "fetched_at": self.fetched_at}
+
+    @property
+    def last_activity(self) -> float | None:
+        """Return the timestamp of the latest known coding activity."""
+        times = [
+            activity
+            for activity in (self.snapshot.last_activity, self.snapshot.last_heartbeat)
+            if activity is not None
+        ]
+        return max(times, default=None)
+
+    @property
+    def coding_now(self) -> bool:
+        """Return True if the user was active within the heartbeat timeout."""
+        last = self.last_activity
+        return last is not None and time.time() - last <= HEARTBEAT_TIMEOUT
+
+    def fetches(self, dataset: str | None) -> bool:
+        """Return True if the profile fetches the endpoint feeding a dataset."""
+        endpoint = DATASET_ENDPOINTS.get(dataset)
+        return endpoint is None or endpoint in PROFILE_ENDPOINTS.get(
+            self.profile, DATASET_INTERVALS
         )
 
+    def stale_since(self, dataset: str | None) -> float | None:
+        """Return when a dataset served after a failed fetch was last fetched."""
+        endpoint = DATASET_ENDPOINTS.get(dataset)
+        if endpoint not in self.stale_endpoints:
+            return None
+        return self.fetched_at.get(endpoint)
+
+    def needed_endpoints(self) -> set[str]:
+        """Return the endpoints read by at least one enabled entity."""
+        if self.profile in PROFILE_ENDPOINTS:
+            return set(PROFILE_ENDPOINTS[self.profile])
+        if not self.entity_datasets:
+            # Entities are not set up yet (first refresh): fetch everything.
+            return set(DATASET_INTERVALS)
+        registry = er.async_get(self.hass)
+        disabled = {
+            registry_entry.unique_id
+            for registry_entry in er.async_entries_for_config_entry(
+                registry, self.config_entry.entry_id
+            )
+            if registry_entry.disabled_by is not None
+        }
+        return {"user_info"} | {
+            DATASET_ENDPOINTS[dataset]
+            for unique_id, dataset in self.entity_datasets.items()
+            if unique_id not in disabled and dataset in DATASET_ENDPOINTS
+        }
+
+    @callback
+    def async_heartbeats_received(self) -> None:
+        """Publish the live dataset after editors posted heartbeats."""
+        data = self.data or {}
+        self.data = {**data, "heartbeats": self.heartbeats.as_dataset()}
+        self.changed_datasets = {"heartbeats"}
+        self.snapshot = self.snapshot.update(
+            self.data, self.changed_datasets, self._kept_datasets
+        )
+        self.async_update_listeners()
+
+        if self._poll_interval > self._poll_floor:
+            # Activity after an idle period: poll at the floor again, starting now.
+            self._poll_interval = self._poll_floor
+            self._schedule = [
+                entry for entry in self._schedule if entry[1] not in ACTIVITY_DATASETS
+            ]
+            heapq.heapify(self._schedule)
+            for endpoint in ACTIVITY_DATASETS:
+                heapq.heappush(self._schedule, (time.monotonic(), endpoint))
+            self.hass.async_create_task(self.async_request_refresh())
+
+    def _adapt_polling(self) -> None:
+        """Poll at the floor while active, back off exponentially while idle."""
+        if self.coding_now:
+            self._poll_interval = self._poll_floor
+        else:
+            self._poll_interval = min(self._poll_interval * 2, self._poll_ceiling)
+
+    def _interval(self, endpoint: str) -> float:
+        """Return the current polling interval of an endpoint in seconds."""
+        if endpoint == "durations":
+            return self._poll_interval
+        return max(DATASET_INTERVALS[endpoint].total_seconds(), self._poll_interval)
+
+    def _pop_due(self, now: float) -> set[str]:
+        """Remove and return the endpoints whose due time has passed."""
+        due = set()
+        while self._schedule and self._schedule[0][0] <= now:
+            due.add(heapq.heappop(self._schedule)[1])
+        return due
+
+    def _reschedule(self, endpoint: str, now: float, *, retry: bool = False) -> None:
+        """Queue an endpoint on its next slot, or soon again after a failure."""
+        if any(queued == endpoint for _, queued in self._schedule):
+            # Already expedited while it was being fetched.
+            return
+        if retry:
+            # Retry failed endpoints on the shortest cadence.
+            due = now + min(DATASET_INTERVALS.values()).total_seconds()
+        else:
+            due = self._scheduler.next_due(now, self._interval(endpoint), self._phase)
+        heapq.heappush(self._schedule, (due, endpoint))
+
     async def _async_update_data(self):
-        """Update data via library."""
+        """
+        Update data via library.
+
+        Due endpoints are fetched concurrently, each with its own timeout.
+        Datasets that fail are left out of the result so only the sensors
+        depending on them become unavailable. The client returns the very
+        same object for a 304 response, so datasets are compared by identity
+        and only the ones that changed are sliced and re-extracted.
+        """
+        now = time.monotonic()
+        due = self._pop_due(now)
         try:
-            async with async_timeout.timeout(10):
-                summary = await self.client.get_summary()
-                stats = await self.client.get_stats()
-                user_info = await self.client.get_user_info()
-                last_7_days = await self.client.get_last_7_days()
-                all_time = await self.client.get_all_time_since_today()
-
-                return {
-                    "summary": summary,
-                    "stats": stats,
-                    "user_info": user_info,
-                    "last_7_days": last_7_days,
-                    "all_time": all_time,
+            data = await self._async_update_due(now, due)
+        except Exception:
+            self.client.metrics.record_refresh(time.monotonic() - now, success=False)
+            raise
+        self.client.metrics.record_refresh(time.monotonic() - now, success=True)
+        return data
+
+    async def _async_update_due(self, now: float, due: set[str]) -> dict[str, Any]:
+        """Fetch the due endpoints and merge them into the previous data."""
+        # Endpoints no enabled entity reads are skipped but stay on schedule.
+        skipped = due - self.needed_endpoints()
+        for endpoint in skipped:
+            self._reschedule(endpoint, now)
+        due -= skipped
+
+        today = dt_util.now().date()
+        fetchers = {
+            name: fetch
+            for name, fetch in (
+                ("stats", self.client.get_stats),
+                ("user_info", self.client.get_user_info),
+                ("all_time", self.client.get_all_time_since_today),
+                ("durations", partial(self.client.get_durations, today)),
+                (
+                    "summaries",
+                    partial(self.history.async_sync, self._fetch_summaries, today),
+                ),
+            )
+            if name in due
+        }
+
+        results = await asyncio.gather(
+            *(
+                self._async_fetch_dataset(fetch)
+                if name != "summaries"
+                # The sync applies the time budget to each of its requests.
+                else fetch()
+                for name, fetch in fetchers.items()
+            ),
+            return_exceptions=True,
+        )
+
+        previous = self.data or {}
+        data = dict(previous)
+        wall = time.time()
+        changed_days, failed, errors = self._merge_results(
+            dict(zip(fetchers, results, strict=True)), data, wall
+        )
+
+        changed = {name for name in data if data[name] is not previous.get(name)}
+        if "summaries" in due and "summaries" not in failed:
+            changed |= await self._async_rebuild_windows(
+                today, previous, data, changed_days
+            )
+        kept, toggled = self._apply_staleness(data, due, failed, wall)
+        changed |= toggled
+
+        if data or kept:
+            self.changed_datasets = changed
+            self.snapshot = self.snapshot.update(data, changed, kept)
+            self._kept_datasets = kept
+            if "durations" in due:
+                self._adapt_polling()
+
+        for endpoint in due:
+            self._reschedule(endpoint, now, retry=endpoint in failed)
+        self.update_interval = timedelta(
+            seconds=max(self._schedule[0][0] - time.monotonic(), 1)
+        )
+
+        if not data and not kept:
+            raise UpdateFailed(f"Error communicating with API: {', '.join(errors)}")
+
+        if self.stale:
+            # Everything has to be rewritten once to clear the stale flag.
+            self.changed_datasets = set(data) | kept
+            self.stale = False
+        # Fetches returning the same data still advance their fetch time.
+        if (changed or due - failed) and self._store is not None:
+            self._store.async_delay_save(self._stored_data, STORAGE_SAVE_DELAY)
+        return data
+
+    def _merge_results(
+        self, results: dict[str, Any], data: dict[str, Any], wall: float
+    ) -> tuple[set[date], set[str], list[str]]:
+        """
+        Merge fetched datasets into data, recording their fetch time.
+
+        Returns the days the summaries sync changed, the failed endpoints and
+        a description of each failure.
+        """
+        changed_days: set[date] = set()
+        failed = set()
+        errors = []
+        for name, result in results.items():
+            if result is None:
+                # The client logged the error response it got instead of data.
+                errors.append(f"{name}: no data")
+                failed.add(name)
+            elif isinstance(result, BaseException):
+                _LOGGER.warning("Error fetching %s from Wakatime API: %r", name, result)
+                errors.append(f"{name}: {result!r}")
+                failed.add(name)
+            else:
+                self.fetched_at[name] = wall
+                if name == "summaries":
+                    changed_days = result | self._backfilled_days
+                    self._backfilled_days = set()
+                else:
+                    data[name] = result
+        return changed_days, failed, errors
+
+    async def _async_rebuild_windows(
+        self,
+        today: date,
+        previous: dict[str, Any],
+        data: dict[str, Any],
+        changed_days: set[date],
+    ) -> set[str]:
+        """
+        Rebuild the datasets read from the history after a sync.
+
+        Only the windows containing a changed day or whose dates moved on are
+        read again. Returns the names of the datasets rebuilt in data.
+        """
+        changed = set()
+        windows = {
+            name: (today - timedelta(days=days), today)
+            for name, days in SUMMARY_WINDOWS.items()
+        }
+        for name, (start, end) in windows.items():
+            if (
+                name in previous
+                and self._windows.get(name) == (start, end)
+                and not any(start <= day <= end for day in changed_days)
+            ):
+                continue
+            data[name] = await self.history.async_days(start, end)
+            changed.add(name)
+        self._windows = windows
+
+        self.query_cache.invalidate(changed_days)
+        if self._backfill_failed:
+            self.async_start_backfill()
+        if self._statistics is not None:
+            self._async_import_statistics(today, changed_days)
+        series_changed = await self._async_update_series(today, changed_days)
+        if self._rolling_windows and (series_changed or "rolling" not in data):
+            data["rolling"] = {
+                days: self.series.window(today, days) for days in self._rolling_windows
+            }
+            changed.add("rolling")
+        return changed
+
+    def _apply_staleness(
+        self, data: dict[str, Any], due: set[str], failed: set[str], wall: float
+    ) -> tuple[set[str], set[str]]:
+        """
+        Drop the data of failed endpoints that is too old to keep serving.
+
+        Returns the datasets served from the snapshot without data, and the
+        datasets whose endpoint entered or left staleness.
+        """
+        stale = {
+            endpoint
+            for endpoint in failed
+            if self._max_staleness
+            and endpoint in self.fetched_at
+            and wall - self.fetched_at[endpoint]
+            <= self._interval(endpoint) + self._max_staleness
+        }
+        if "summaries" in failed - stale:
+            for name in (*SUMMARY_WINDOWS, "rolling"):
+                data.pop(name, None)
+        for endpoint in failed - stale:
+            data.pop(endpoint, None)
+        stale |= self.stale_endpoints - due
+        # Datasets restored from the store have no data to keep after a
+        # restart; their restored values are served instead.
+        kept = {
+            name
+            for name, endpoint in DATASET_ENDPOINTS.items()
+            if endpoint in stale and name not in data and name in self.snapshot.datasets
+        }
+        # Entities of endpoints entering or leaving staleness are rewritten.
+        toggled = {
+            name
+            for name, endpoint in DATASET_ENDPOINTS.items()
+            if endpoint in stale ^ self.stale_endpoints
+            and (name in data or name in kept)
+        }
+        self.stale_endpoints = stale
+        return kept, toggled
+
+    @callback
+    def _async_import_statistics(self, today: date, changed_days: set[date]) -> None:
+        """Import the synced days as statistics without delaying the refresh."""
+        task = self.hass.async_create_background_task(
+            self._statistics.async_import(
+                today, changed_days, self.snapshot.display_name or "Wakatime"
+            ),
+            f"{DOMAIN} statistics {self.key}",
+        )
+        self._statistics_tasks.add(task)
+        task.add_done_callback(self._statistics_tasks.discard)
+
+    @callback
+    def async_start_backfill(self) -> None:
+        """Backfill the history in the background unless it already is."""
+        if self._backfill_task is not None and not self._backfill_task.done():
+            return
+        self._backfill_task = self.hass.async_create_background_task(
+            self.async_backfill(), f"{DOMAIN} backfill {self.key}"
+        )
+
+    async def async_backfill(self) -> None:
+        """Backfill the history, then sync to publish the days it stored."""
+        changed_days, failed = await self.history.async_backfill(
+            self._fetch_summaries, dt_util.now().date()
+        )
+        self._backfill_failed = bool(failed)
+        if not changed_days:
+            return
+        self._backfilled_days |= changed_days
+        self._schedule = [entry for entry in self._schedule if entry[1] != "summaries"]
+        heapq.heapify(self._schedule)
+        heapq.heappush(self._schedule, (time.monotonic(), "summaries"))
+        await self.async_request_refresh()
+
+    async def _async_update_series(self, today: date, changed_days: set[date]) -> bool:
+        """Bring the daily series up to date, returning True if it changed."""
+        if not self._rolling_windows:
+            return False
+        if self.series is None:
+            start = today - timedelta(days=HISTORY_DAYS - 1)
+            totals = await self.history.async_daily_totals(start, today)
+            self.series = DailySeries(
+                start,
+                [
+                    totals.get(start + timedelta(days=offset), 0.0)
+                    for offset in range(HISTORY_DAYS)
+                ],
+            )
+            return True
+
+        moved = today > self.series.end
+        self.series.extend(today)
+        if changed_days:
+            totals = await self.history.async_daily_totals(
+                min(changed_days), max(changed_days)
+            )
+            for day in changed_days:
+                self.series.set(day, totals.get(day, 0.0))
+        return moved or bool(changed_days)
+
+    async def _async_fetch_dataset(self, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Fetch a single dataset within its own time budget."""
+        async with self._scheduler.semaphore, async_timeout.timeout(ENDPOINT_TIMEOUT):
+            return await fetch()
+
+    async def _fetch_summaries(
+        self, start: date, end: date
+    ) -> tuple[DaySummary, ...] | None:
+        """Fetch one summaries range for the history sync."""
+        return await self._async_fetch_dataset(
+            partial(self.client.get_summaries, start, end)
+        )
+
+    async def async_query(self, key: QueryKey) -> dict[str, Any]:
+        """
+        Return the coding time of a date range, overall or for one dimension.
+
+        Without a filter the days hold the total coding time and, with a
+        dimension, the top items of that dimension are listed; with a filter
+        the days hold the coding time of that item only. Days the history
+        lacks are fetched and stored first, so later queries read them
+        locally too. Results only covering final days are cached until
+        evicted, others for QUERY_RECENT_TTL.
+        """
+        now = time.monotonic()
+        if (result := self.query_cache.get(key, now)) is not None:
+            return result
+
+        today = dt_util.now().date()
+        filled, missing = await self.history.async_fill(
+            self._fetch_summaries, key.start, key.end, today
+        )
+        self.query_cache.invalidate(filled)
+
+        if key.dimension is not None and key.name is not None:
+            totals = await self.history.async_item_totals(
+                key.dimension, key.name, key.start, key.end
+            )
+        else:
+            totals = await self.history.async_daily_totals(key.start, key.end)
+        days = {
+            day.isoformat(): totals.get(day, 0.0)
+            for day in (
+                key.start + timedelta(days=offset)
+                for offset in range((key.end - key.start).days + 1)
+            )
+        }
+        total = sum(days.values())
+        result: dict[str, Any] = {
+            "start": key.start.isoformat(),
+            "end": key.end.isoformat(),
+            "dimension": key.dimension,
+            "filter": key.name,
+            "total_seconds": total,
+            "days": days,
+            "missing_days": [day.isoformat() for day in missing],
+        }
+        if key.dimension is not None and key.name is None:
+            result["items"] = [
+                {
+                    "name": name,
+                    "total_seconds": seconds,
+                    "percent": round(seconds * 100 / total, 2) if total else 0.0,
                 }
-        except Exception as err:
-            raise UpdateFailed(f"Error communicating with API: {err}") from err
+                for name, seconds in await self.history.async_top(
+                    key.dimension, key.start, key.end, key.limit
+                )
+            ]
+
+        final = key.end < today - timedelta(days=1) and not missing
+        self.query_cache.put(key, result, None if final else now + QUERY_RECENT_TTL)
+        return result
+
+    async def async_shutdown(self) -> None:
+        """Cancel refreshes and background tasks, then close the history."""
+        await super().async_shutdown()
+        tasks = set(self._statistics_tasks)
+        if self._backfill_task is not None:
+            tasks.add(self._backfill_task)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.wait(tasks)
+        await self.history.async_close()
@@ -1,24 +1,123 @@
 """API client for Wakatime."""
 
+import asyncio
 import logging
-from datetime import datetime, timedelta
+import time
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass
+from datetime import UTC, date, datetime, timedelta
+from email.utils import parsedate_to_datetime
+from functools import partial
+from http import HTTPStatus
+from typing import Any
 
 import aiohttp
+from aiohttp import hdrs
+from homeassistant.util.json import json_loads
+
+from .const import (
+    COALESCE_TTL,
+    MAX_RETRIES,
+    RATE_LIMIT_BURST,
+    RATE_LIMIT_PER_SECOND,
+    RETRY_MAX_WAIT,
+)
+from .metrics import ApiMetrics
+from .models import (
+    AllTime,
+    DaySummary,
+    Durations,
+    Stats,
+    UserInfo,
+    parse_all_time,
+    parse_durations,
+    parse_stats,
+    parse_summaries,
+    parse_user_info,
+    parse_wakapi_summary,
+)
+from .ratelimit import RateLimiter
 
 _LOGGER = logging.getLogger(__name__)
 
 import base64
 
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+# Statuses of a heartbeat request whose heartbeats were accepted.
+HEARTBEAT_STATUSES = frozenset({200, 201, 202})
+
+
+class WakatimeApiError(Exception):
+    """Error raised by the Wakatime API client."""
+
+
+class WakatimeRateLimitError(WakatimeApiError):
+    """The API kept throttling requests after all retries."""
+
+
+class WakatimeEndpointMissingError(WakatimeApiError):
+    """The server does not provide an optional endpoint."""
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Return the delay in seconds announced by a Retry-After header."""
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max((retry_at - datetime.now(UTC)).total_seconds(), 0.0)
+
+
+def merge_date_ranges(ranges: Iterable[tuple[date, date]]) -> list[tuple[date, date]]:
+    """
+    Merge overlapping or adjacent inclusive date ranges.
+
+    Returns the fewest ranges covering the same days, sorted by start date,
+    so each one can be fetched with a single summaries call.
+    """
+    merged: list[tuple[date, date]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + timedelta(days=1):
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+            continue
+        merged.append((start, end))
+    return merged
+
+
+@dataclass(slots=True)
+class _Flight:
+    """A request in flight and the number of callers awaiting it."""
+
+    task: asyncio.Task
+    waiters: int = 0
+
+
+@dataclass(slots=True)
+class CachedResponse:
+    """Validators and projected body of the last successful response for a URL."""
+
+    url: str
+    etag: str | None
+    last_modified: str | None
+    data: Any
+
 
 class WakatimeApiClient:
     """API client for Wakatime."""
 
+    backend = "wakatime"
+
     def _prepare_auth_and_url(self, api_key: str, base_url: str) -> tuple[str, str]:
         """Prepare authentication and URL for different API providers."""
         if "wakatime.com" not in base_url:
             # Wakapi needs base64 encoded API key
-            b = base64.b64encode(bytes(api_key, 'utf-8'))
-            api_key = b.decode('utf-8')
+            b = base64.b64encode(bytes(api_key, "utf-8"))
+            api_key = b.decode("utf-8")
             # Wakapi endpoints differ from Wakatime
             if "compat/wakatime" not in base_url:
                 base_url += "/compat/wakatime/v1"
@@ -27,56 +126,339 @@ class WakatimeApiClient:
             base_url = base_url[:-1]
         return api_key, base_url
 
-    def __init__(self, api_key: str, session: aiohttp.ClientSession,
-                 base_url: str = "https://wakatime.com/api/v1") -> None:
+    def __init__(
+        self,
+        api_key: str,
+        session: aiohttp.ClientSession,
+        base_url: str = "https://wakatime.com/api/v1",
+        rate_limiter: RateLimiter | None = None,
+    ) -> None:
         """Initialize the API client."""
         api_key, base_url = self._prepare_auth_and_url(api_key, base_url)
         self._api_key = api_key
         self._session = session
+        # Shared per host when given, so all entries on a host back off together.
+        self._rate_limiter = rate_limiter or RateLimiter(
+            RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST
+        )
         self._headers = {"Authorization": f"Basic {api_key}"}
         self._base_url = base_url
+        # Keyed by endpoint path so URLs whose query changes daily (summaries)
+        # replace their previous entry instead of growing the cache.
+        self._cache: dict[str, CachedResponse] = {}
+        # Single-flight state keyed by URL: requests in flight and results of
+        # the last COALESCE_TTL seconds with their expiry.
+        self._flights: dict[str, _Flight] = {}
+        self._recent: dict[str, tuple[float, Any]] = {}
+        self.metrics = ApiMetrics()
+        # Optional endpoints the server answered with 404.
+        self.unsupported: set[str] = set()
 
-    async def _fetch_data(self, endpoint: str) -> dict:
-        """Fetch data from the API."""
-        url = f"{self._base_url}/{endpoint}"
-        async with self._session.get(url, headers=self._headers) as response:
-            if response.status != 200:
-                _LOGGER.error(
-                    "Error fetching data from Wakatime API: %s, %s", response.status, url
+    async def _fetch_data(
+        self,
+        endpoint: str,
+        parse: Callable[[dict], Any] | None = None,
+        *,
+        base_url: str | None = None,
+        optional: bool = False,
+    ) -> Any:
+        """
+        Fetch data from the API, sharing one request between callers.
+
+        Concurrent calls for the same URL await the same request, and a
+        successful result is reused for COALESCE_TTL seconds, so setup and
+        reload storms do not send the same request several times. The request
+        is cancelled only once every caller waiting for it was cancelled.
+
+        An optional endpoint raises WakatimeEndpointMissingError on 404
+        instead of being logged as an error.
+        """
+        url = f"{base_url or self._base_url}/{endpoint}"
+        path = endpoint.partition("?")[0]
+        now = time.monotonic()
+        if (recent := self._recent.get(url)) is not None and recent[0] > now:
+            self.metrics.record_shared(path)
+            return recent[1]
+
+        flight = self._flights.get(url)
+        if flight is None:
+            flight = _Flight(
+                asyncio.ensure_future(
+                    self._request(url, path, parse, optional=optional)
+                )
+            )
+            self._flights[url] = flight
+            flight.task.add_done_callback(partial(self._flight_done, url))
+        else:
+            self.metrics.record_shared(path)
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1:
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def _flight_done(self, url: str, task: asyncio.Task) -> None:
+        """Forget a finished request, keeping a successful result briefly."""
+        del self._flights[url]
+        if task.cancelled() or task.exception() is not None or not task.result():
+            return
+        now = time.monotonic()
+        self._recent = {
+            key: recent for key, recent in self._recent.items() if recent[0] > now
+        }
+        self._recent[url] = (now + COALESCE_TTL, task.result())
+
+    async def _request(
+        self,
+        url: str,
+        path: str,
+        parse: Callable[[dict], Any] | None,
+        *,
+        optional: bool = False,
+    ) -> Any:
+        """
+        Send a request, with retries, and decode the response.
+
+        When parse is given, the decoded body is projected with it right away
+        and only the projection is returned and cached, so the raw payload
+        can be freed. Error responses are passed to parse as an empty dict.
+
+        Requests are made conditional when the previous response for the same
+        URL carried an ETag or Last-Modified header. On 304 Not Modified the
+        cached object is returned as is, so callers can detect unchanged data
+        by identity.
+
+        Throttled (429) and temporarily unavailable responses are retried up
+        to MAX_RETRIES times once the rate limiter's backoff has passed, as
+        long as that delay fits in RETRY_MAX_WAIT.
+        """
+        headers = self._headers
+        cached = self._cache.get(path)
+        if cached is not None and cached.url == url:
+            headers = dict(self._headers)
+            if cached.etag:
+                headers[hdrs.IF_NONE_MATCH] = cached.etag
+            if cached.last_modified:
+                headers[hdrs.IF_MODIFIED_SINCE] = cached.last_modified
+        else:
+            cached = None
+
+        for attempt in range(MAX_RETRIES + 1):
+            await self._rate_limiter.acquire()
+            started = time.monotonic()
+            try:
+                async with self._session.get(url, headers=headers) as response:
+                    missing = optional and response.status == HTTPStatus.NOT_FOUND
+                    if response.status not in RETRY_STATUSES and not missing:
+                        self._rate_limiter.reset()
+                        data, size = await self._handle_response(
+                            response, url, path, cached, parse
+                        )
+                        self.metrics.record_call(
+                            path,
+                            response.status,
+                            time.monotonic() - started,
+                            size,
+                            retry=attempt > 0,
+                        )
+                        return data
+                    retry_after = parse_retry_after(
+                        response.headers.get(hdrs.RETRY_AFTER)
+                    )
+            except BaseException as err:
+                # Network errors, timeouts and cancellation by the coordinator.
+                self.metrics.record_call(
+                    path,
+                    type(err).__name__,
+                    time.monotonic() - started,
+                    retry=attempt > 0,
                 )
-                return {}
+                raise
+            self.metrics.record_call(
+                path, response.status, time.monotonic() - started, retry=attempt > 0
+            )
+            if missing:
+                msg = f"Endpoint not found: {url}"
+                raise WakatimeEndpointMissingError(msg)
+
+            # The limiter blocks the next acquire() for the whole backoff delay.
+            delay = self._rate_limiter.backoff(retry_after)
+            if attempt == MAX_RETRIES or delay > RETRY_MAX_WAIT:
+                break
+            _LOGGER.debug(
+                "Wakatime API returned %s for %s, retrying in %.1fs",
+                response.status,
+                url,
+                delay,
+            )
+
+        if response.status == HTTPStatus.TOO_MANY_REQUESTS:
+            msg = f"Rate limited by Wakatime API: {url}"
+            raise WakatimeRateLimitError(msg)
+        _LOGGER.error(
+            "Error fetching data from Wakatime API: %s, %s", response.status, url
+        )
+        return parse({}) if parse else {}
+
+    async def _handle_response(
+        self,
+        response: aiohttp.ClientResponse,
+        url: str,
+        path: str,
+        cached: CachedResponse | None,
+        parse: Callable[[dict], Any] | None,
+    ) -> tuple[Any, int]:
+        """
+        Decode a final response and update the conditional request cache.
+
+        Returns the data and the size of the decoded body.
+        """
+        if response.status == HTTPStatus.NOT_MODIFIED and cached is not None:
+            return cached.data, 0
 
-            data = await response.json()
-            return data
+        if response.status != HTTPStatus.OK:
+            _LOGGER.error(
+                "Error fetching data from Wakatime API: %s, %s", response.status, url
+            )
+            return (parse({}) if parse else {}), 0
 
-    async def get_user_info(self) -> dict:
+        body = await response.read()
+        data = json_loads(body)
+        if parse is not None:
+            data = parse(data)
+        etag = response.headers.get(hdrs.ETAG)
+        last_modified = response.headers.get(hdrs.LAST_MODIFIED)
+        if etag or last_modified:
+            self._cache[path] = CachedResponse(url, etag, last_modified, data)
+        else:
+            self._cache.pop(path, None)
+        return data, len(body)
+
+    async def async_send_heartbeats(self, heartbeats: list[dict]) -> int:
+        """
+        Forward heartbeats received from editors to the API.
+
+        Returns the status of the API's response; network errors and
+        timeouts are raised to the caller.
+        """
+        await self._rate_limiter.acquire()
+        started = time.monotonic()
+        async with self._session.post(
+            f"{self._base_url}/users/current/heartbeats.bulk",
+            headers=self._headers,
+            json=heartbeats,
+        ) as response:
+            self.metrics.record_call(
+                "users/current/heartbeats.bulk",
+                response.status,
+                time.monotonic() - started,
+            )
+            if response.status not in HEARTBEAT_STATUSES:
+                _LOGGER.error(
+                    "Error forwarding heartbeats to Wakatime API: %s", response.status
+                )
+            return response.status
+
+    async def get_user_info(self) -> UserInfo | None:
         """Get user information."""
-        return await self._fetch_data("users/current")
+        return await self._fetch_data("users/current", parse_user_info)
 
-    async def get_summary(self) -> dict:
-        """Get summary for today."""
-        today = datetime.now().strftime("%Y-%m-%d")
-        yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+    async def get_summaries(
+        self, start: date, end: date
+    ) -> tuple[DaySummary, ...] | None:
+        """Get daily summaries for an inclusive date range."""
         return await self._fetch_data(
-            f"users/current/summaries?start={yesterday}&end={today}"
+            f"users/current/summaries?start={start:%Y-%m-%d}&end={end:%Y-%m-%d}",
+            parse_summaries,
         )
 
-    async def get_stats(self) -> dict:
-        """Get stats for the current user."""
-        return await self._fetch_data("users/current/stats")
-
-    async def get_last_7_days(self) -> dict:
-        """Get stats for the last 7 days."""
-        end_date = datetime.now().strftime("%Y-%m-%d")
-        start_date = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
+    async def get_durations(self, day: date) -> Durations | None:
+        """Get the coding durations of a single day."""
         return await self._fetch_data(
-            f"users/current/summaries?start={start_date}&end={end_date}"
+            f"users/current/durations?date={day:%Y-%m-%d}", parse_durations
         )
 
-    async def get_all_time_since_today(self) -> dict:
+    async def get_stats(self) -> Stats | None:
+        """Get stats for the current user."""
+        return await self._fetch_data("users/current/stats", parse_stats)
+
+    async def get_all_time_since_today(self) -> AllTime | None:
         """Get all time stats."""
-        return await self._fetch_data("users/current/all_time_since_today")
+        return await self._fetch_data(
+            "users/current/all_time_since_today", parse_all_time
+        )
 
     async def get_categories(self) -> dict:
         """Get category information."""
         return await self._fetch_data("users/current/categories")
+
+
+class WakapiApiClient(WakatimeApiClient):
+    """
+    API client for Wakapi, preferring its native API over the compat layer.
+
+    Wakapi emulates the Wakatime API under /compat/wakatime/v1. Where its
+    native API answers the same question more cheaply, e.g. one summary with
+    every breakdown from its pre-aggregated daily summaries, the native
+    endpoint is used. Servers without it (older releases, proxies exposing
+    only the compat API) answer 404; the endpoint is then remembered as
+    unsupported and the compat endpoint is used from then on.
+    """
+
+    backend = "wakapi"
+
+    def __init__(
+        self,
+        api_key: str,
+        session: aiohttp.ClientSession,
+        base_url: str,
+        rate_limiter: RateLimiter | None = None,
+    ) -> None:
+        """Initialize the API client."""
+        super().__init__(api_key, session, base_url, rate_limiter)
+        # The native API lives next to the compat one, e.g. https://host/api.
+        self._native_url = self._base_url.partition("/compat/wakatime")[0]
+
+    async def _fetch_native(
+        self,
+        endpoint: str,
+        parse: Callable[[dict], Any],
+        fallback: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """Fetch a native endpoint, or fall back to compat if it is missing."""
+        if endpoint in self.unsupported:
+            return await fallback()
+        try:
+            return await self._fetch_data(
+                endpoint, parse, base_url=self._native_url, optional=True
+            )
+        except WakatimeEndpointMissingError:
+            _LOGGER.info(
+                "Wakapi at %s has no native %s endpoint, using the compat API",
+                self._native_url,
+                endpoint,
+            )
+            self.unsupported.add(endpoint)
+            return await fallback()
+
+    async def get_stats(self) -> Stats | None:
+        """Get the stats of the last 7 days from a single native summary."""
+        return await self._fetch_native(
+            "summary?interval=last_7_days", parse_wakapi_summary, super().get_stats
+        )
+
+
+def create_api_client(
+    api_key: str,
+    session: aiohttp.ClientSession,
+    base_url: str = "https://wakatime.com/api/v1",
+    rate_limiter: RateLimiter | None = None,
+) -> WakatimeApiClient:
+    """Return the client matching the backend a base URL points to."""
+    client_class = WakatimeApiClient if "wakatime.com" in base_url else WakapiApiClient
+    return client_class(api_key, session, base_url, rate_limiter)
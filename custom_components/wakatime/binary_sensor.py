@@ -1,61 +1,130 @@
-"""Binary sensor platform for integration_blueprint."""
+"""Binary sensor platform for Wakatime integration."""
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
 
 from homeassistant.components.binary_sensor import (
     BinarySensorDeviceClass,
     BinarySensorEntity,
     BinarySensorEntityDescription,
 )
+from homeassistant.core import CALLBACK_TYPE, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util
 
-from .entity import IntegrationBlueprintEntity
+from .const import DOMAIN, HEARTBEAT_TIMEOUT, ICON_CODING
+from .entity import WakatimeEntity
 
 if TYPE_CHECKING:
+    from homeassistant.config_entries import ConfigEntry
     from homeassistant.core import HomeAssistant
     from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
-    from .coordinator import BlueprintDataUpdateCoordinator
-    from .data import IntegrationBlueprintConfigEntry
 
-ENTITY_DESCRIPTIONS = (
-    BinarySensorEntityDescription(
-        key="integration_blueprint",
-        name="Integration Blueprint Binary Sensor",
-        device_class=BinarySensorDeviceClass.CONNECTIVITY,
+@dataclass(frozen=True, kw_only=True)
+class WakatimeBinarySensorEntityDescription(BinarySensorEntityDescription):
+    """Describes a Wakatime binary sensor."""
+
+    dataset: str
+
+
+BINARY_SENSOR_TYPES: tuple[WakatimeBinarySensorEntityDescription, ...] = (
+    WakatimeBinarySensorEntityDescription(
+        key="coding_now",
+        dataset="durations",
+        translation_key="coding_now",
+        device_class=BinarySensorDeviceClass.RUNNING,
+        icon=ICON_CODING,
     ),
 )
 
 
 async def async_setup_entry(
-    hass: HomeAssistant,  # noqa: ARG001 Unused function argument: `hass`
-    entry: IntegrationBlueprintConfigEntry,
+    hass: HomeAssistant,
+    entry: ConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
-    """Set up the binary_sensor platform."""
+    """Set up Wakatime binary sensor based on a config entry."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+
     async_add_entities(
-        IntegrationBlueprintBinarySensor(
-            coordinator=entry.runtime_data.coordinator,
+        WakatimeBinarySensor(
+            coordinator=coordinator,
             entity_description=entity_description,
+            entry_id=entry.entry_id,
         )
-        for entity_description in ENTITY_DESCRIPTIONS
+        for entity_description in BINARY_SENSOR_TYPES
+        if coordinator.fetches(entity_description.dataset)
     )
 
 
-class IntegrationBlueprintBinarySensor(IntegrationBlueprintEntity, BinarySensorEntity):
-    """integration_blueprint binary_sensor class."""
+class WakatimeBinarySensor(WakatimeEntity, BinarySensorEntity):
+    """
+    Binary sensor that is on while the user is coding.
 
-    def __init__(
-        self,
-        coordinator: BlueprintDataUpdateCoordinator,
-        entity_description: BinarySensorEntityDescription,
-    ) -> None:
-        """Initialize the binary_sensor class."""
-        super().__init__(coordinator)
-        self.entity_description = entity_description
+    Activity comes from the durations endpoint and from heartbeats editors
+    send to Home Assistant. The sensor turns itself off once the heartbeat
+    timeout has passed since the latest activity, without waiting for the
+    next poll.
+    """
+
+    entity_description: WakatimeBinarySensorEntityDescription
+    _unsub_expire: CALLBACK_TYPE | None = None
+
+    @property
+    def available(self) -> bool:
+        """Return True if any source of activity is known."""
+        return self.coordinator.last_update_success and (
+            not {"durations", "heartbeats"}.isdisjoint(
+                self.coordinator.snapshot.datasets
+            )
+        )
 
     @property
     def is_on(self) -> bool:
-        """Return true if the binary_sensor is on."""
-        return self.coordinator.data.get("title", "") == "foo"
+        """Return true if the user is coding right now."""
+        return self.coordinator.coding_now
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return the time of the latest activity."""
+        last = self.coordinator.last_activity
+        if last is None:
+            return None
+        return {"last_activity": dt_util.utc_from_timestamp(last).isoformat()}
+
+    async def async_added_to_hass(self) -> None:
+        """Schedule the automatic switch off when added."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self._cancel_expire)
+        self._schedule_expire()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state only when presence or the latest activity changed."""
+        self._schedule_expire()
+        self._async_write_if_changed()
+
+    @callback
+    def _cancel_expire(self) -> None:
+        if self._unsub_expire is not None:
+            self._unsub_expire()
+            self._unsub_expire = None
+
+    @callback
+    def _schedule_expire(self) -> None:
+        """Re-evaluate the state once the latest activity times out."""
+        self._cancel_expire()
+        last = self.coordinator.last_activity
+        if last is None:
+            return
+        delay = last + HEARTBEAT_TIMEOUT - dt_util.utcnow().timestamp()
+        if delay > 0:
+            self._unsub_expire = async_call_later(self.hass, delay + 1, self._expired)
+
+    @callback
+    def _expired(self, _now: Any) -> None:
+        self._unsub_expire = None
+        self._async_write_if_changed()
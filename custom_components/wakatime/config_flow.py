@@ -8,11 +8,38 @@ from typing import Any
 import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.const import CONF_API_KEY
+from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.selector import (
+    SelectSelector,
+    SelectSelectorConfig,
+    SelectSelectorMode,
+)
 
 from .api import WakatimeApiClient
-from .const import DOMAIN, NAME, CONF_BASE_URL
+from .const import (
+    CONF_BASE_URL,
+    CONF_FORWARD_HEARTBEATS,
+    CONF_ITEM_MIN_PERCENT,
+    CONF_ITEM_SENSORS,
+    CONF_MAX_STALENESS,
+    CONF_POLL_CEILING,
+    CONF_POLL_FLOOR,
+    CONF_PROFILE,
+    CONF_RECORD_ATTRIBUTES,
+    CONF_ROLLING_WINDOWS,
+    DEFAULT_ITEM_MIN_PERCENT,
+    DEFAULT_ITEM_SENSORS,
+    DEFAULT_MAX_STALENESS,
+    DEFAULT_POLL_CEILING,
+    DEFAULT_POLL_FLOOR,
+    DOMAIN,
+    PROFILE_FULL,
+    PROFILE_MINIMAL,
+    ROLLING_WINDOWS,
+)
+from .ratelimit import get_rate_limiter
+from .transport import async_get_session, async_release_session
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -21,6 +48,15 @@ class WakatimeConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Wakatime."""
 
     VERSION = 1
+    MINOR_VERSION = 2
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,  # noqa: ARG004
+    ) -> WakatimeOptionsFlow:
+        """Get the options flow for this handler."""
+        return WakatimeOptionsFlow()
 
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
@@ -31,32 +67,111 @@ class WakatimeConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         if user_input is not None:
             base_url = user_input.get(CONF_BASE_URL, "https://wakatime.com/api/v1")
             api_key = user_input[CONF_API_KEY]
-            session = async_get_clientsession(self.hass)
-            client = WakatimeApiClient(api_key, session, base_url=base_url)
+            session = async_get_session(self.hass, base_url, self.flow_id)
+            client = WakatimeApiClient(
+                api_key,
+                session,
+                base_url=base_url,
+                rate_limiter=get_rate_limiter(self.hass, base_url),
+            )
 
             try:
                 user_info = await client.get_user_info()
-                if "data" in user_info and "email" in user_info["data"]:
+                if user_info is not None and user_info.email is not None:
                     # Successfully authenticated
-                    await self.async_set_unique_id(user_info["data"]["id"])
+                    await self.async_set_unique_id(user_info.id)
                     self._abort_if_unique_id_configured()
 
                     return self.async_create_entry(
-                        title=user_info["data"]["email"],
+                        title=user_info.email,
                         data=user_input,
                     )
                 errors["base"] = "invalid_auth"
             except Exception:  # pylint: disable=broad-except
                 _LOGGER.exception("Unexpected exception")
                 errors["base"] = "unknown"
+            finally:
+                await async_release_session(self.hass, base_url, self.flow_id)
 
         return self.async_show_form(
             step_id="user",
             data_schema=vol.Schema(
                 {
                     vol.Required(CONF_API_KEY): str,
-                    vol.Optional(CONF_BASE_URL, default="https://wakatime.com/api/v1"): str,
+                    vol.Optional(
+                        CONF_BASE_URL, default="https://wakatime.com/api/v1"
+                    ): str,
                 }
             ),
             errors=errors,
         )
+
+
+class WakatimeOptionsFlow(config_entries.OptionsFlow):
+    """Handle Wakatime options."""
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(data=user_input)
+
+        options = self.config_entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Optional(
+                        CONF_PROFILE,
+                        default=options.get(CONF_PROFILE, PROFILE_FULL),
+                    ): SelectSelector(
+                        SelectSelectorConfig(
+                            options=[PROFILE_FULL, PROFILE_MINIMAL],
+                            mode=SelectSelectorMode.LIST,
+                            translation_key=CONF_PROFILE,
+                        )
+                    ),
+                    vol.Optional(
+                        CONF_FORWARD_HEARTBEATS,
+                        default=options.get(CONF_FORWARD_HEARTBEATS, False),
+                    ): bool,
+                    vol.Optional(
+                        CONF_POLL_FLOOR,
+                        default=options.get(CONF_POLL_FLOOR, DEFAULT_POLL_FLOOR),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=60)),
+                    vol.Optional(
+                        CONF_POLL_CEILING,
+                        default=options.get(CONF_POLL_CEILING, DEFAULT_POLL_CEILING),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=1440)),
+                    vol.Optional(
+                        CONF_MAX_STALENESS,
+                        default=options.get(CONF_MAX_STALENESS, DEFAULT_MAX_STALENESS),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=1440)),
+                    vol.Optional(
+                        CONF_ROLLING_WINDOWS,
+                        default=options.get(CONF_ROLLING_WINDOWS, []),
+                    ): SelectSelector(
+                        SelectSelectorConfig(
+                            options=[str(days) for days in ROLLING_WINDOWS],
+                            multiple=True,
+                            translation_key=CONF_ROLLING_WINDOWS,
+                        )
+                    ),
+                    vol.Optional(
+                        CONF_ITEM_SENSORS,
+                        default=options.get(CONF_ITEM_SENSORS, DEFAULT_ITEM_SENSORS),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=500)),
+                    vol.Optional(
+                        CONF_ITEM_MIN_PERCENT,
+                        default=options.get(
+                            CONF_ITEM_MIN_PERCENT, DEFAULT_ITEM_MIN_PERCENT
+                        ),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0, max=100)),
+                    vol.Optional(
+                        CONF_RECORD_ATTRIBUTES,
+                        default=options.get(CONF_RECORD_ATTRIBUTES, False),
+                    ): bool,
+                }
+            ),
+        )
@@ -1,5 +1,6 @@
 """Constants for the Wakatime integration."""
 
+from datetime import timedelta
 from logging import Logger, getLogger
 
 LOGGER: Logger = getLogger(__package__)
@@ -7,6 +8,40 @@ LOGGER: Logger = getLogger(__package__)
 DOMAIN = "wakatime"
 NAME = "Wakatime"
 SCAN_INTERVAL = 30  # Minutes
+ENDPOINT_TIMEOUT = 10  # Seconds, per API call
+
+# Summary windows served from the local history, in days before today.
+SUMMARY_WINDOWS = {
+    "summary": 1,
+    "last_7_days": 7,
+}
+
+# Activity-adaptive polling bounds, in minutes
+DEFAULT_POLL_FLOOR = 2
+DEFAULT_POLL_CEILING = 60
+
+# How often each endpoint is refetched. "summaries" syncs the local history,
+# which feeds every window in SUMMARY_WINDOWS; the other endpoints map one to
+# one onto datasets.
+DATASET_INTERVALS = {
+    "summaries": timedelta(minutes=15),
+    "stats": timedelta(minutes=SCAN_INTERVAL),
+    "all_time": timedelta(hours=6),
+    "user_info": timedelta(hours=24),
+    # Adapts between the configured poll floor and ceiling, see coordinator.
+    "durations": timedelta(minutes=DEFAULT_POLL_FLOOR),
+}
+# Endpoint feeding each dataset; "heartbeats" is local and has none.
+DATASET_ENDPOINTS = {
+    **dict.fromkeys(SUMMARY_WINDOWS, "summaries"),
+    "stats": "stats",
+    "all_time": "all_time",
+    "user_info": "user_info",
+    "durations": "durations",
+    "rolling": "summaries",
+}
+# Endpoints refetched right away when activity resumes after an idle period.
+ACTIVITY_DATASETS = ("summaries", "durations")
 
 # Icons
 ICON_CODING = "mdi:code-braces"
@@ -22,5 +57,91 @@ ICON_WEEKLY = "mdi:calendar-week"
 ICON_PRODUCTIVITY = "mdi:trending-up"
 ICON_ACTIVE_TIME = "mdi:clock-time-eight"
 ICON_STREAK = "mdi:fire"
+ICON_API = "mdi:api"
 
 CONF_BASE_URL = "base_url"
+CONF_FORWARD_HEARTBEATS = "forward_heartbeats"
+CONF_POLL_FLOOR = "poll_floor"
+CONF_POLL_CEILING = "poll_ceiling"
+CONF_ITEM_SENSORS = "item_sensors"
+CONF_ITEM_MIN_PERCENT = "item_min_percent"
+CONF_PROFILE = "profile"
+CONF_ROLLING_WINDOWS = "rolling_windows"
+CONF_MAX_STALENESS = "max_staleness"
+CONF_RECORD_ATTRIBUTES = "record_attributes"
+
+# Rolling windows, in days, that can get sensors; at most HISTORY_DAYS.
+ROLLING_WINDOWS = (7, 30, 90, 365)
+
+# Fetch profiles: "full" fetches what enabled entities read, the others are
+# fixed sets of endpoints. user_info provides the device and is always kept.
+PROFILE_FULL = "full"
+PROFILE_MINIMAL = "minimal"
+PROFILE_ENDPOINTS = {
+    PROFILE_MINIMAL: frozenset({"summaries", "user_info"}),
+}
+
+# Per-project and per-language sensors: how many of the top items get a
+# sensor (0 disables them) and the share of coding time an item needs.
+DEFAULT_ITEM_SENSORS = 0
+DEFAULT_ITEM_MIN_PERCENT = 1.0
+
+# Minutes past its regular refresh that the last good data of an endpoint
+# is still served while fetching it fails.
+DEFAULT_MAX_STALENESS = 120
+
+# Local heartbeat ingestion
+HEARTBEAT_TIMEOUT = 15 * 60  # Seconds between heartbeats still counted as coding
+HEARTBEAT_BUFFER_SIZE = 1000
+HEARTBEAT_CHUNK_SIZE = 100
+
+# Requests per second and burst size allowed per API host, shared by all
+# config entries using that host.
+RATE_LIMIT_PER_SECOND = 1.0
+RATE_LIMIT_BURST = 10
+# Requests in flight at once across all config entries.
+MAX_CONCURRENT_REQUESTS = 4
+MAX_RETRIES = 3
+BACKOFF_BASE = 1.0  # Seconds
+BACKOFF_MAX = 300.0  # Seconds
+# Longer Retry-After or backoff delays fail the request instead of waiting.
+RETRY_MAX_WAIT = 5.0  # Seconds
+# Results reused by concurrent or repeated requests for the same URL.
+COALESCE_TTL = 5.0  # Seconds
+# Pooled connections of each API host. Idle connections outlive a refresh
+# with its retries and history chunks, but not the gap between polls.
+HTTP_KEEPALIVE_TIMEOUT = 75.0  # Seconds
+HTTP_DNS_CACHE_TTL = 300  # Seconds
+
+# Local history of daily summaries
+HISTORY_DAYS = 365
+HISTORY_CHUNK_DAYS = 31
+HISTORY_SYNC_CONCURRENCY = 2
+HISTORY_BACKFILL_RETRY = timedelta(days=1)
+
+# Results of the query service: entries kept, and how long results covering
+# today or yesterday (still changing) are reused. Older results never expire.
+QUERY_CACHE_SIZE = 128
+QUERY_RECENT_TTL = 60.0  # Seconds
+QUERY_DEFAULT_LIMIT = 10
+QUERY_MAX_LIMIT = 100
+
+SERVICE_QUERY = "query"
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_START = "start"
+ATTR_END = "end"
+ATTR_DIMENSION = "dimension"
+ATTR_FILTER = "filter"
+ATTR_LIMIT = "limit"
+
+# Dimensions of the history imported as long-term statistics, next to the
+# daily total.
+STATISTICS_DIMENSIONS = ("projects", "languages")
+
+# Request instrumentation
+METRICS_LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # Seconds
+METRICS_SAMPLES = 100  # Recent observations used for percentiles
+METRICS_WINDOW = 3600  # Seconds covered by the per-hour counters
+
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 60  # Seconds
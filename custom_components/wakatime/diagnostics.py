@@ -0,0 +1,60 @@
+"""Diagnostics support for the Wakatime integration."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.const import CONF_API_KEY
+
+from .const import CONF_BASE_URL, DOMAIN
+from .ratelimit import get_rate_limiter
+
+if TYPE_CHECKING:
+    from homeassistant.config_entries import ConfigEntry
+    from homeassistant.core import HomeAssistant
+
+    from . import WakatimeDataUpdateCoordinator
+
+TO_REDACT = {
+    CONF_API_KEY,
+    "display_name",
+    "live_project",
+    "other_projects",
+    "project_seconds",
+    "title",
+    "top_project",
+    "unique_id",
+    "user_id",
+}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return request metrics and polling state of a config entry."""
+    coordinator: WakatimeDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+    base_url = entry.data.get(CONF_BASE_URL, "https://wakatime.com/api/v1")
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "coordinator": {
+            "last_update_success": coordinator.last_update_success,
+            "update_interval": (
+                coordinator.update_interval.total_seconds()
+                if coordinator.update_interval
+                else None
+            ),
+            "stale": coordinator.stale,
+            "stale_endpoints": sorted(coordinator.stale_endpoints),
+            "fetched_at": coordinator.fetched_at,
+            "datasets": sorted(coordinator.snapshot.datasets),
+            "coding_now": coordinator.coding_now,
+        },
+        "api": {
+            "backend": coordinator.client.backend,
+            "unsupported": sorted(coordinator.client.unsupported),
+        },
+        "rate_limiter": get_rate_limiter(hass, base_url).budget,
+        "metrics": coordinator.client.metrics.as_dict(),
+        "snapshot": async_redact_data(coordinator.snapshot.as_dict(), TO_REDACT),
+    }
@@ -1,28 +1,95 @@
-"""BlueprintEntity class."""
+"""Base entity for the Wakatime integration."""
 
 from __future__ import annotations
 
-from homeassistant.helpers.device_registry import DeviceInfo
+from typing import TYPE_CHECKING
+
+from homeassistant.core import callback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import ATTRIBUTION
-from .coordinator import BlueprintDataUpdateCoordinator
+from . import WakatimeDataUpdateCoordinator
+from .const import DOMAIN
+
+if TYPE_CHECKING:
+    from homeassistant.helpers.entity import EntityDescription
+
 
+class WakatimeEntity(CoordinatorEntity[WakatimeDataUpdateCoordinator]):
+    """
+    Wakatime entity backed by one dataset of the coordinator.
 
-class IntegrationBlueprintEntity(CoordinatorEntity[BlueprintDataUpdateCoordinator]):
-    """BlueprintEntity class."""
+    The entity description must provide a dataset attribute naming the
+    coordinator dataset the entity reads, or None for entities that follow
+    every refresh (such as the diagnostic sensors).
+    """
 
-    _attr_attribution = ATTRIBUTION
+    _attr_has_entity_name = True
 
-    def __init__(self, coordinator: BlueprintDataUpdateCoordinator) -> None:
-        """Initialize."""
+    def __init__(
+        self,
+        coordinator: WakatimeDataUpdateCoordinator,
+        entity_description: EntityDescription,
+        entry_id: str,
+    ) -> None:
+        """Initialize the entity."""
         super().__init__(coordinator)
-        self._attr_unique_id = coordinator.config_entry.entry_id
-        self._attr_device_info = DeviceInfo(
-            identifiers={
-                (
-                    coordinator.config_entry.domain,
-                    coordinator.config_entry.entry_id,
-                ),
-            },
+        self.entity_description = entity_description
+        self._attr_unique_id = f"{entry_id}_{entity_description.key}"
+        coordinator.entity_datasets[self._attr_unique_id] = entity_description.dataset
+        # What the last state write published, see _fingerprint.
+        self._last_written: tuple | None = None
+
+        snapshot = coordinator.snapshot
+        if snapshot.user_id is not None:
+            self._attr_device_info = {
+                "identifiers": {(DOMAIN, snapshot.user_id)},
+                "name": snapshot.display_name,
+                "manufacturer": "Wakatime",
+                "model": "API",
+            }
+
+    @property
+    def available(self) -> bool:
+        """Return True if the dataset backing this entity was fetched."""
+        dataset = self.entity_description.dataset
+        return super().available and (
+            dataset is None or dataset in self.coordinator.snapshot.datasets
         )
+
+    async def async_added_to_hass(self) -> None:
+        """Remember the state Home Assistant writes once the entity is added."""
+        await super().async_added_to_hass()
+        self._last_written = self._fingerprint()
+
+    def _fingerprint(self) -> tuple:
+        """Return the availability, state and attributes a write would publish."""
+        if not self.available:
+            return (False,)
+        return (True, self.state, self.extra_state_attributes)
+
+    @callback
+    def _async_write_if_changed(self) -> None:
+        """Write state unless it equals what was last written."""
+        fingerprint = self._fingerprint()
+        if fingerprint != self._last_written:
+            self._last_written = fingerprint
+            self.async_write_ha_state()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """
+        Write state when it changed after a refresh.
+
+        Entities whose dataset did not change are skipped without computing
+        their state, unless their availability changed; the others are only
+        written if their state or attributes differ from the last write, so
+        a refresh returning the same values writes nothing.
+        """
+        dataset = self.entity_description.dataset
+        last_available = self._last_written[0] if self._last_written else None
+        if (
+            dataset is None
+            or dataset in self.coordinator.changed_datasets
+            or self.available != last_available
+        ):
+            self._async_write_if_changed()
@@ -0,0 +1,132 @@
+"""Import of the local history into Home Assistant's long-term statistics."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import date, timedelta
+from typing import TYPE_CHECKING
+
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_add_external_statistics
+from homeassistant.const import UnitOfTime
+from homeassistant.util import dt as dt_util
+from homeassistant.util import slugify
+
+from .const import DOMAIN, HISTORY_DAYS, STATISTICS_DIMENSIONS
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
+
+    from .history import WakatimeHistory
+
+# Meta keys of the history: first imported day, and last day imported.
+META_START = "statistics_start"
+META_CURSOR = "statistics_cursor"
+
+
+class StatisticsImporter:
+    """
+    Write daily coding time as external statistics, one row per day.
+
+    The overall total and every project and language get a statistic
+    (e.g. wakatime:<account>_projects_home_assistant) in hours, with the
+    cumulative sum counted from the first imported day. A cursor in the
+    history's meta table remembers the last imported day, so each import
+    writes the days after it plus the days a sync changed, and the sums of
+    the days before that are read back from the history instead of the
+    recorder.
+    """
+
+    def __init__(self, hass: HomeAssistant, history: WakatimeHistory, key: str) -> None:
+        """Initialize the importer for the account with the given key."""
+        self._hass = hass
+        self._history = history
+        self._prefix = f"{DOMAIN}:{key}"
+        self._lock = asyncio.Lock()
+
+    async def async_import(
+        self, today: date, changed: set[date], title: str = "Wakatime"
+    ) -> None:
+        """Import the days changed by a sync and those after the cursor."""
+        async with self._lock:
+            if (stored := await self._history.async_get_meta(META_START)) is None:
+                epoch = today - timedelta(days=HISTORY_DAYS - 1)
+                await self._history.async_set_meta(META_START, epoch.isoformat())
+            else:
+                epoch = date.fromisoformat(stored)
+            cursor = await self._history.async_get_meta(META_CURSOR)
+            start = epoch
+            if cursor is not None:
+                start = min({*changed, date.fromisoformat(cursor) + timedelta(days=1)})
+            start = max(start, epoch)
+            if start > today:
+                return
+            days = [
+                start + timedelta(days=offset)
+                for offset in range((today - start).days + 1)
+            ]
+            before = start - timedelta(days=1)
+
+            totals = await self._history.async_daily_totals(start, today)
+            base = sum((await self._history.async_daily_totals(epoch, before)).values())
+            self._add("daily_total", f"{title} daily total", days, totals, base)
+
+            for dimension in STATISTICS_DIMENSIONS:
+                bases = dict(
+                    await self._history.async_top(dimension, epoch, before, -1)
+                )
+                items: dict[str, tuple[str, dict[date, float], float]] = {}
+                for name, seconds in (
+                    await self._history.async_breakdown(dimension, start, today)
+                ).items():
+                    if not (slug := slugify(name)):
+                        continue
+                    # Names differing only in case or punctuation share a slug.
+                    _, merged, merged_base = items.get(slug, (name, {}, 0.0))
+                    for day, value in seconds.items():
+                        merged[day] = merged.get(day, 0.0) + value
+                    items[slug] = (name, merged, merged_base + bases.get(name, 0.0))
+                for slug, (name, seconds, item_base) in items.items():
+                    self._add(
+                        f"{dimension}_{slug}",
+                        f"{title} {dimension} {name}",
+                        days,
+                        seconds,
+                        item_base,
+                    )
+
+            await self._history.async_set_meta(META_CURSOR, today.isoformat())
+
+    def _add(
+        self,
+        suffix: str,
+        name: str,
+        days: list[date],
+        seconds: dict[date, float],
+        base: float,
+    ) -> None:
+        """Queue the rows of one statistic, starting from the sum before days."""
+        total = base
+        rows = []
+        for day in days:
+            value = seconds.get(day, 0.0)
+            total += value
+            rows.append(
+                StatisticData(
+                    start=dt_util.start_of_local_day(day),
+                    state=value / 3600,
+                    sum=total / 3600,
+                )
+            )
+        async_add_external_statistics(
+            self._hass,
+            StatisticMetaData(
+                has_mean=False,
+                has_sum=True,
+                name=name,
+                source=DOMAIN,
+                statistic_id=f"{self._prefix}_{suffix}",
+                unit_of_measurement=UnitOfTime.HOURS,
+            ),
+            rows,
+        )
@@ -0,0 +1,279 @@
+"""Local ingestion of WakaTime heartbeats sent directly by editors."""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import binascii
+import hmac
+import logging
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from http import HTTPStatus
+from operator import attrgetter
+from typing import TYPE_CHECKING, Any, ClassVar, NamedTuple
+
+import aiohttp
+import async_timeout
+from homeassistant.components.http import KEY_HASS, HomeAssistantView
+from homeassistant.const import CONF_API_KEY
+from homeassistant.util import dt as dt_util
+
+from .api import HEARTBEAT_STATUSES
+from .const import (
+    CONF_FORWARD_HEARTBEATS,
+    DOMAIN,
+    ENDPOINT_TIMEOUT,
+    HEARTBEAT_BUFFER_SIZE,
+    HEARTBEAT_CHUNK_SIZE,
+    HEARTBEAT_TIMEOUT,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from datetime import date
+
+    from aiohttp import web
+
+    from . import WakatimeDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class Heartbeat:
+    """A single editor heartbeat."""
+
+    time: float
+    entity: str
+    project: str | None
+    language: str | None
+
+
+class LiveActivity(NamedTuple):
+    """Today's coding time and latest heartbeat computed from local heartbeats."""
+
+    total_seconds: int
+    last_heartbeat: float
+    project: str | None
+    language: str | None
+    entity: str
+
+
+class HeartbeatTracker:
+    """
+    Buffer of today's heartbeats with incrementally computed durations.
+
+    Follows WakaTime's rule: the time between two consecutive heartbeats
+    counts as coding time when the gap is at most HEARTBEAT_TIMEOUT. A new
+    heartbeat extends today's total by its gap to the latest one. A late one
+    (e.g. from another editor, or queued while offline) is inserted among the
+    buffered heartbeats and the total adjusted for the gaps it splits, so
+    heartbeats arriving in any order add up to the same total. Heartbeats
+    already buffered, such as a retried batch, are not counted again.
+
+    The buffer keeps the last maxlen heartbeats; late heartbeats older than
+    all of them are ignored, since the gaps they split are unknown.
+    """
+
+    def __init__(
+        self, maxlen: int = HEARTBEAT_BUFFER_SIZE, timeout: float = HEARTBEAT_TIMEOUT
+    ) -> None:
+        """Initialize an empty tracker."""
+        self._buffer: list[Heartbeat] = []
+        self._maxlen = maxlen
+        # Whether heartbeats of today were dropped from the buffer.
+        self._truncated = False
+        self._timeout = timeout
+        self._day: date | None = None
+        self._last: Heartbeat | None = None
+        self.today_seconds = 0.0
+
+    @property
+    def last(self) -> Heartbeat | None:
+        """Return the most recent heartbeat."""
+        return self._last
+
+    def add(self, heartbeats: Iterable[dict[str, Any]]) -> int:
+        """Add raw heartbeat payloads, returning how many were accepted."""
+        parsed = []
+        for raw in heartbeats:
+            try:
+                parsed.append(
+                    Heartbeat(
+                        time=float(raw["time"]),
+                        entity=str(raw.get("entity", "")),
+                        project=raw.get("project"),
+                        language=raw.get("language"),
+                    )
+                )
+            except (KeyError, TypeError, ValueError):
+                continue
+        parsed.sort(key=lambda heartbeat: heartbeat.time)
+
+        for heartbeat in parsed:
+            day = dt_util.as_local(dt_util.utc_from_timestamp(heartbeat.time)).date()
+            if self._last is None or heartbeat.time > self._last.time:
+                self._append(heartbeat, day)
+            elif day == self._day:
+                self._insert(heartbeat)
+        return len(parsed)
+
+    def _gap(self, earlier: Heartbeat | None, later: Heartbeat | None) -> float:
+        """Return the coding time between two consecutive heartbeats."""
+        if earlier is None or later is None:
+            return 0.0
+        gap = later.time - earlier.time
+        return gap if gap <= self._timeout else 0.0
+
+    def _append(self, heartbeat: Heartbeat, day: date) -> None:
+        """Count a heartbeat newer than all others, starting a new day if needed."""
+        if day != self._day:
+            self._day = day
+            self.today_seconds = 0.0
+            self._buffer.clear()
+            self._truncated = False
+        elif self._buffer:
+            self.today_seconds += self._gap(self._buffer[-1], heartbeat)
+        self._store(len(self._buffer), heartbeat)
+        self._last = heartbeat
+
+    def _insert(self, heartbeat: Heartbeat) -> None:
+        """Count a late heartbeat of today between its buffered neighbors."""
+        key = attrgetter("time")
+        first = bisect_left(self._buffer, heartbeat.time, key=key)
+        index = bisect_right(self._buffer, heartbeat.time, lo=first, key=key)
+        if any(
+            buffered.entity == heartbeat.entity
+            for buffered in self._buffer[first:index]
+        ):
+            return
+        if index == 0 and self._truncated:
+            return
+        before = self._buffer[index - 1] if index else None
+        after = self._buffer[index] if index < len(self._buffer) else None
+        self.today_seconds += (
+            self._gap(before, heartbeat)
+            + self._gap(heartbeat, after)
+            - self._gap(before, after)
+        )
+        self._store(index, heartbeat)
+
+    def _store(self, index: int, heartbeat: Heartbeat) -> None:
+        """Insert a heartbeat into the buffer, dropping the oldest when full."""
+        self._buffer.insert(index, heartbeat)
+        if len(self._buffer) > self._maxlen:
+            del self._buffer[0]
+            self._truncated = True
+
+    def as_dataset(self) -> LiveActivity | None:
+        """Return the tracker state as a coordinator dataset."""
+        if self._last is None:
+            return None
+        today = dt_util.now().date()
+        return LiveActivity(
+            int(self.today_seconds) if self._day == today else 0,
+            self._last.time,
+            self._last.project,
+            self._last.language,
+            self._last.entity,
+        )
+
+
+def _api_key_from_header(header: str | None) -> str | None:
+    """
+    Return the API key from a Basic authorization header.
+
+    Editors send the key base64 encoded, but some clients send it as is,
+    so a token that is not valid base64 is returned unchanged.
+    """
+    if not header or not header.lower().startswith("basic "):
+        return None
+    token = header[6:].strip()
+    try:
+        return base64.b64decode(token, validate=True).decode()
+    except (binascii.Error, UnicodeDecodeError):
+        return token
+
+
+class WakatimeHeartbeatView(HomeAssistantView):
+    """
+    Accept the WakaTime heartbeat API from editors.
+
+    Point an editor's api_url at http://<home-assistant>/api/wakatime and it
+    posts heartbeats here. Requests are authenticated with the API key of a
+    configured account instead of a Home Assistant token, since editors
+    cannot send one.
+
+    With forwarding enabled, heartbeats are sent on to the API before the
+    editor gets its answer, and a failed forward is answered with an error,
+    so the editor keeps the heartbeats in its offline queue and retries.
+    """
+
+    url = "/api/wakatime/users/current/heartbeats"
+    extra_urls: ClassVar[list[str]] = ["/api/wakatime/users/current/heartbeats.bulk"]
+    name = "api:wakatime:heartbeats"
+    requires_auth = False
+
+    async def post(self, request: web.Request) -> web.Response:
+        """Ingest one heartbeat or a bulk list of heartbeats."""
+        hass = request.app[KEY_HASS]
+        api_key = _api_key_from_header(request.headers.get("Authorization"))
+        entry = None
+        if api_key:
+            for entry_id in hass.data.get(DOMAIN, {}):
+                candidate = hass.config_entries.async_get_entry(entry_id)
+                if candidate and hmac.compare_digest(
+                    candidate.data[CONF_API_KEY].encode(), api_key.encode()
+                ):
+                    entry = candidate
+                    break
+        if entry is None:
+            return self.json_message("Unauthorized", HTTPStatus.UNAUTHORIZED)
+
+        try:
+            body = await request.json()
+        except ValueError:
+            return self.json_message("Invalid JSON", HTTPStatus.BAD_REQUEST)
+        bulk = isinstance(body, list)
+        heartbeats = body if bulk else [body]
+
+        coordinator: WakatimeDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+        # Large bursts are processed in chunks so other tasks keep running.
+        for start in range(0, len(heartbeats), HEARTBEAT_CHUNK_SIZE):
+            coordinator.heartbeats.add(heartbeats[start : start + HEARTBEAT_CHUNK_SIZE])
+            await asyncio.sleep(0)
+        coordinator.async_heartbeats_received()
+        _LOGGER.debug("Received %s heartbeats for %s", len(heartbeats), entry.title)
+
+        if entry.options.get(CONF_FORWARD_HEARTBEATS, False):
+            status = await self._async_forward(coordinator, heartbeats)
+            if status not in HEARTBEAT_STATUSES:
+                return self.json_message("Forwarding heartbeats failed", status)
+
+        if bulk:
+            return self.json(
+                {
+                    "responses": [
+                        [{"data": heartbeat}, HTTPStatus.CREATED]
+                        for heartbeat in heartbeats
+                    ]
+                },
+                HTTPStatus.CREATED,
+            )
+        return self.json({"data": body}, HTTPStatus.CREATED)
+
+    @staticmethod
+    async def _async_forward(
+        coordinator: WakatimeDataUpdateCoordinator, heartbeats: list[dict[str, Any]]
+    ) -> int:
+        """Send heartbeats on to the API, returning the status for the editor."""
+        try:
+            async with async_timeout.timeout(ENDPOINT_TIMEOUT):
+                return await coordinator.client.async_send_heartbeats(heartbeats)
+        except TimeoutError:
+            _LOGGER.warning("Timeout forwarding heartbeats to the Wakatime API")
+            return HTTPStatus.GATEWAY_TIMEOUT
+        except aiohttp.ClientError as err:
+            _LOGGER.warning("Error forwarding heartbeats to the Wakatime API: %r", err)
+            return HTTPStatus.BAD_GATEWAY
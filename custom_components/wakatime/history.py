@@ -0,0 +1,403 @@
+"""Local SQLite store of daily Wakatime summaries with incremental sync."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from datetime import date, timedelta
+from typing import TYPE_CHECKING, Any
+
+from .api import WakatimeApiError, merge_date_ranges
+from .const import (
+    HISTORY_BACKFILL_RETRY,
+    HISTORY_CHUNK_DAYS,
+    HISTORY_DAYS,
+    HISTORY_SYNC_CONCURRENCY,
+)
+from .models import DaySummary, DayTotal
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Iterable
+
+    from homeassistant.core import HomeAssistant
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class NoSummariesError(Exception):
+    """The API returned no summaries for a range."""
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS days (
+    date TEXT PRIMARY KEY,
+    total_seconds REAL NOT NULL,
+    text TEXT,
+    final INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS breakdown (
+    date TEXT NOT NULL,
+    dimension TEXT NOT NULL,
+    name TEXT NOT NULL,
+    total_seconds REAL NOT NULL,
+    PRIMARY KEY (date, dimension, name)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _chunk_ranges(days: Iterable[tuple[date, date]]) -> list[tuple[date, date]]:
+    """Merge day ranges and split them into HISTORY_CHUNK_DAYS, newest first."""
+    ranges = []
+    for range_start, range_end in merge_date_ranges(days):
+        chunk_start = range_start
+        while chunk_start <= range_end:
+            chunk_end = min(
+                chunk_start + timedelta(days=HISTORY_CHUNK_DAYS - 1), range_end
+            )
+            ranges.append((chunk_start, chunk_end))
+            chunk_start = chunk_end + timedelta(days=1)
+    ranges.sort(reverse=True)
+    return ranges
+
+
+class WakatimeHistory:
+    """
+    Per-day summaries broken down by project, language, editor, OS and category.
+
+    Days before yesterday are final once stored and never fetched again, so
+    a sync only requests today and yesterday. The days still missing from
+    the last HISTORY_DAYS are fetched by a separate backfill, grouped into
+    ranges of at most HISTORY_CHUNK_DAYS, newest first with bounded
+    concurrency and committed one range at a time, so an interrupted
+    backfill resumes where it stopped.
+
+    All database access runs in the executor.
+    """
+
+    def __init__(self, hass: HomeAssistant, path: str) -> None:
+        """Initialize the store; call async_setup before use."""
+        self._hass = hass
+        self._path = path
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    async def async_setup(self) -> None:
+        """Open the database and create the schema."""
+        await self._hass.async_add_executor_job(self._setup)
+
+    async def async_close(self) -> None:
+        """Close the database."""
+        await self._hass.async_add_executor_job(self._close)
+
+    def _setup(self) -> None:
+        conn = sqlite3.connect(self._path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        self._conn = conn
+
+    def _close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _query(self, sql: str, params: Iterable[Any] = ()) -> list[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, tuple(params)).fetchall()
+
+    async def async_sync(
+        self,
+        fetch: Callable[[date, date], Awaitable[tuple[DaySummary, ...] | None]],
+        today: date,
+    ) -> set[date]:
+        """
+        Fetch yesterday and today, returning the changed days.
+
+        Raises if they could not be fetched.
+        """
+        yesterday = today - timedelta(days=1)
+        (result,) = await self._async_fetch_ranges(
+            fetch, [(yesterday, today)], yesterday
+        )
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    async def async_backfill(
+        self,
+        fetch: Callable[[date, date], Awaitable[tuple[DaySummary, ...] | None]],
+        today: date,
+    ) -> tuple[set[date], list[date]]:
+        """
+        Fetch the days of the last HISTORY_DAYS not stored as final yet.
+
+        Returns the changed days and the days of the ranges that failed, to
+        be retried by a later backfill. Ranges already stored are skipped, so
+        an interrupted backfill resumes where it stopped. Once the API returns
+        nothing for a range (e.g. beyond the plan's history limit), no backfill
+        is attempted again for HISTORY_BACKFILL_RETRY.
+        """
+        retry_at = await self.async_get_meta("backfill_retry_at")
+        if retry_at is not None and time.time() < float(retry_at):
+            return set(), []
+
+        start = today - timedelta(days=HISTORY_DAYS - 1)
+        yesterday = today - timedelta(days=1)
+        final = {
+            date.fromisoformat(row[0])
+            for row in await self._hass.async_add_executor_job(
+                self._query,
+                "SELECT date FROM days WHERE final = 1 AND date >= ?",
+                (start.isoformat(),),
+            )
+        }
+        ranges = _chunk_ranges(
+            (day, day)
+            for offset in range(HISTORY_DAYS - 2)
+            if (day := start + timedelta(days=offset)) not in final
+        )
+        results = await self._async_fetch_ranges(fetch, ranges, yesterday)
+
+        changed: set[date] = set()
+        failed: list[date] = []
+        for (range_start, range_end), result in zip(ranges, results, strict=True):
+            if not isinstance(result, BaseException):
+                changed |= result
+                continue
+            _LOGGER.debug(
+                "Backfill of %s..%s failed: %r", range_start, range_end, result
+            )
+            if isinstance(result, NoSummariesError):
+                await self.async_set_meta(
+                    "backfill_retry_at",
+                    str(time.time() + HISTORY_BACKFILL_RETRY.total_seconds()),
+                )
+            else:
+                failed.extend(
+                    range_start + timedelta(days=offset)
+                    for offset in range((range_end - range_start).days + 1)
+                )
+        return changed, sorted(failed)
+
+    async def async_fill(
+        self,
+        fetch: Callable[[date, date], Awaitable[tuple[DaySummary, ...] | None]],
+        start: date,
+        end: date,
+        today: date,
+    ) -> tuple[set[date], list[date]]:
+        """
+        Fetch the days between start and end that are not stored yet.
+
+        Unlike a sync this reaches beyond HISTORY_DAYS and ignores the
+        backfill retry delay. Returns the changed days and the days that are
+        still missing because their range could not be fetched.
+        """
+        ranges = _chunk_ranges(
+            (day, day) for day in await self.async_missing_days(start, end)
+        )
+        results = await self._async_fetch_ranges(
+            fetch, ranges, today - timedelta(days=1)
+        )
+
+        changed: set[date] = set()
+        missing: list[date] = []
+        for (range_start, range_end), result in zip(ranges, results, strict=True):
+            if not isinstance(result, BaseException):
+                changed |= result
+                continue
+            _LOGGER.debug(
+                "Fetching %s..%s for a query failed: %r", range_start, range_end, result
+            )
+            missing.extend(
+                range_start + timedelta(days=offset)
+                for offset in range((range_end - range_start).days + 1)
+            )
+        return changed, sorted(missing)
+
+    async def _async_fetch_ranges(
+        self,
+        fetch: Callable[[date, date], Awaitable[tuple[DaySummary, ...] | None]],
+        ranges: list[tuple[date, date]],
+        yesterday: date,
+    ) -> list[set[date] | BaseException]:
+        """
+        Fetch and store ranges with bounded concurrency.
+
+        Returns the changed days of each range, or the error that kept it
+        from being stored.
+        """
+        semaphore = asyncio.Semaphore(HISTORY_SYNC_CONCURRENCY)
+
+        async def _sync_range(range_start: date, range_end: date) -> set[date]:
+            async with semaphore:
+                days = await fetch(range_start, range_end)
+            if days is None:
+                msg = f"Error response for {range_start}..{range_end}"
+                raise WakatimeApiError(msg)
+            if not days:
+                msg = f"No summaries for {range_start}..{range_end}"
+                raise NoSummariesError(msg)
+            return await self._hass.async_add_executor_job(
+                self._store_days, range_start, days, yesterday
+            )
+
+        return await asyncio.gather(
+            *(_sync_range(*summary_range) for summary_range in ranges),
+            return_exceptions=True,
+        )
+
+    async def async_get_meta(self, key: str) -> str | None:
+        """Return a value stored in the meta table."""
+        return await self._hass.async_add_executor_job(self._get_meta, key)
+
+    async def async_set_meta(self, key: str, value: str) -> None:
+        """Store a value in the meta table."""
+        await self._hass.async_add_executor_job(self._set_meta, key, value)
+
+    def _get_meta(self, key: str) -> str | None:
+        rows = self._query("SELECT value FROM meta WHERE key = ?", (key,))
+        return rows[0][0] if rows else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+            )
+
+    def _store_days(
+        self, range_start: date, days: tuple[DaySummary, ...], yesterday: date
+    ) -> set[date]:
+        """Upsert one summaries response, returning the days whose totals changed."""
+        changed = set()
+        with self._lock, self._conn:
+            for offset, day in enumerate(days):
+                # Days carry their own date; fall back to their position in
+                # the range for responses without one.
+                day_date = (
+                    date.fromisoformat(day.total.date)
+                    if day.total.date
+                    else range_start + timedelta(days=offset)
+                )
+                total = day.total.total_seconds
+                row = self._conn.execute(
+                    "SELECT total_seconds FROM days WHERE date = ?",
+                    (day_date.isoformat(),),
+                ).fetchone()
+                if row is None or row[0] != total:
+                    changed.add(day_date)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO days (date, total_seconds, text, final) "
+                    "VALUES (?, ?, ?, ?)",
+                    (
+                        day_date.isoformat(),
+                        total,
+                        day.total.text,
+                        int(day_date < yesterday),
+                    ),
+                )
+                self._conn.execute(
+                    "DELETE FROM breakdown WHERE date = ?", (day_date.isoformat(),)
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO breakdown "
+                    "(date, dimension, name, total_seconds) VALUES (?, ?, ?, ?)",
+                    [
+                        (day_date.isoformat(), dimension, name, seconds)
+                        for dimension, name, seconds in day.breakdown
+                    ],
+                )
+        return changed
+
+    async def async_missing_days(self, start: date, end: date) -> list[date]:
+        """Return the days between start and end that are not stored."""
+        stored = {
+            row[0]
+            for row in await self._hass.async_add_executor_job(
+                self._query,
+                "SELECT date FROM days WHERE date BETWEEN ? AND ?",
+                (start.isoformat(), end.isoformat()),
+            )
+        }
+        return [
+            day
+            for offset in range((end - start).days + 1)
+            if (day := start + timedelta(days=offset)).isoformat() not in stored
+        ]
+
+    async def async_item_totals(
+        self, dimension: str, name: str, start: date, end: date
+    ) -> dict[date, float]:
+        """Return the stored seconds per day of one item of a dimension."""
+        return {
+            date.fromisoformat(row[0]): row[1]
+            for row in await self._hass.async_add_executor_job(
+                self._query,
+                "SELECT date, total_seconds FROM breakdown "
+                "WHERE dimension = ? AND name = ? AND date BETWEEN ? AND ?",
+                (dimension, name, start.isoformat(), end.isoformat()),
+            )
+        }
+
+    async def async_breakdown(
+        self, dimension: str, start: date, end: date
+    ) -> dict[str, dict[date, float]]:
+        """Return the stored seconds per day of every item of a dimension."""
+        items: dict[str, dict[date, float]] = {}
+        for day, name, seconds in await self._hass.async_add_executor_job(
+            self._query,
+            "SELECT date, name, total_seconds FROM breakdown "
+            "WHERE dimension = ? AND date BETWEEN ? AND ?",
+            (dimension, start.isoformat(), end.isoformat()),
+        ):
+            items.setdefault(name, {})[date.fromisoformat(day)] = seconds
+        return items
+
+    async def async_days(self, start: date, end: date) -> tuple[DayTotal, ...]:
+        """Return the stored total of every day between start and end."""
+        rows = {
+            row[0]: row[1:]
+            for row in await self._hass.async_add_executor_job(
+                self._query,
+                "SELECT date, total_seconds, text FROM days WHERE date BETWEEN ? AND ?",
+                (start.isoformat(), end.isoformat()),
+            )
+        }
+        days = (
+            (start + timedelta(days=offset)).isoformat()
+            for offset in range((end - start).days + 1)
+        )
+        return tuple(DayTotal(day, *rows.get(day, (0.0, None))) for day in days)
+
+    async def async_daily_totals(self, start: date, end: date) -> dict[date, float]:
+        """Return the stored total seconds per day between start and end."""
+        return {
+            date.fromisoformat(row[0]): row[1]
+            for row in await self._hass.async_add_executor_job(
+                self._query,
+                "SELECT date, total_seconds FROM days WHERE date BETWEEN ? AND ?",
+                (start.isoformat(), end.isoformat()),
+            )
+        }
+
+    async def async_top(
+        self, dimension: str, start: date, end: date, limit: int = 5
+    ) -> list[tuple[str, float]]:
+        """Return the top items of a dimension by total seconds over a window."""
+        return [
+            (row[0], row[1])
+            for row in await self._hass.async_add_executor_job(
+                self._query,
+                "SELECT name, SUM(total_seconds) AS total FROM breakdown "
+                "WHERE dimension = ? AND date BETWEEN ? AND ? "
+                "GROUP BY name ORDER BY total DESC LIMIT ?",
+                (dimension, start.isoformat(), end.isoformat(), limit),
+            )
+        ]
@@ -0,0 +1,167 @@
+"""Request and refresh instrumentation of the Wakatime client."""
+
+from __future__ import annotations
+
+import bisect
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Any
+
+from .const import METRICS_LATENCY_BUCKETS, METRICS_SAMPLES, METRICS_WINDOW
+
+
+class LatencyHistogram:
+    """
+    Cumulative latency histogram plus a window of recent samples.
+
+    The buckets summarize every observation since setup; percentiles are
+    computed exactly over the last METRICS_SAMPLES observations so they
+    follow the current behaviour of the backend.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty histogram."""
+        self.counts = [0] * (len(METRICS_LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.recent: deque[float] = deque(maxlen=METRICS_SAMPLES)
+
+    def observe(self, seconds: float) -> None:
+        """Add one observation."""
+        self.counts[bisect.bisect_left(METRICS_LATENCY_BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.recent.append(seconds)
+
+    def percentile(self, percent: float) -> float | None:
+        """Return a percentile of the recent observations."""
+        if not self.recent:
+            return None
+        ordered = sorted(self.recent)
+        return ordered[min(int(len(ordered) * percent / 100), len(ordered) - 1)]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the histogram as diagnostics data."""
+        count = sum(self.counts)
+        buckets = dict(
+            zip(
+                [f"le_{bound}" for bound in METRICS_LATENCY_BUCKETS] + ["le_inf"],
+                self.counts,
+                strict=True,
+            )
+        )
+        return {
+            "count": count,
+            "mean": round(self.total / count, 3) if count else None,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "buckets": buckets,
+        }
+
+
+@dataclass(slots=True)
+class EndpointMetrics:
+    """Counters of the calls made to one endpoint."""
+
+    calls: int = 0
+    shared: int = 0
+    retries: int = 0
+    cache_hits: int = 0
+    errors: int = 0
+    bytes: int = 0
+    statuses: Counter[str] = field(default_factory=Counter)
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    last_status: str | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the counters as diagnostics data."""
+        return {
+            "calls": self.calls,
+            "shared": self.shared,
+            "retries": self.retries,
+            "cache_hits": self.cache_hits,
+            "errors": self.errors,
+            "bytes": self.bytes,
+            "statuses": dict(self.statuses),
+            "last_status": self.last_status,
+            "latency": self.latency.as_dict(),
+        }
+
+
+class ApiMetrics:
+    """
+    Per-endpoint request metrics and coordinator refresh timings.
+
+    Statuses are HTTP status codes, or the exception name when a request
+    did not get a response, which tells a slow backend (high latency, 5xx)
+    apart from network trouble (ClientConnectorError, TimeoutError).
+    """
+
+    def __init__(self) -> None:
+        """Initialize empty metrics."""
+        self.endpoints: dict[str, EndpointMetrics] = {}
+        self.refresh = LatencyHistogram()
+        self.refresh_failures = 0
+        # Monotonic time, error and cache hit of the calls of the last hour.
+        self._calls: deque[tuple[float, bool, bool]] = deque()
+
+    def record_call(
+        self,
+        endpoint: str,
+        status: int | str,
+        latency: float,
+        size: int = 0,
+        *,
+        retry: bool = False,
+    ) -> None:
+        """Record one request and its outcome."""
+        metrics = self.endpoints.setdefault(endpoint, EndpointMetrics())
+        error = not isinstance(status, int) or status >= 400  # noqa: PLR2004
+        cache_hit = status == 304  # noqa: PLR2004
+        metrics.calls += 1
+        metrics.retries += retry
+        metrics.cache_hits += cache_hit
+        metrics.errors += error
+        metrics.bytes += size
+        metrics.statuses[str(status)] += 1
+        metrics.last_status = str(status)
+        metrics.latency.observe(latency)
+
+        now = time.monotonic()
+        self._calls.append((now, error, cache_hit))
+        self._prune(now)
+
+    def record_shared(self, endpoint: str) -> None:
+        """Record a call answered by a request in flight or a recent result."""
+        self.endpoints.setdefault(endpoint, EndpointMetrics()).shared += 1
+
+    def record_refresh(self, seconds: float, *, success: bool) -> None:
+        """Record the duration of one coordinator refresh."""
+        self.refresh.observe(seconds)
+        self.refresh_failures += not success
+
+    def _prune(self, now: float) -> None:
+        while self._calls and self._calls[0][0] < now - METRICS_WINDOW:
+            self._calls.popleft()
+
+    def last_hour(self) -> dict[str, int]:
+        """Return the number of calls, errors and cache hits of the last hour."""
+        self._prune(time.monotonic())
+        return {
+            "calls": len(self._calls),
+            "errors": sum(error for _, error, _ in self._calls),
+            "cache_hits": sum(cache_hit for _, _, cache_hit in self._calls),
+        }
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return all metrics as diagnostics data."""
+        return {
+            "last_hour": self.last_hour(),
+            "refresh": {
+                **self.refresh.as_dict(),
+                "failures": self.refresh_failures,
+            },
+            "endpoints": {
+                endpoint: metrics.as_dict()
+                for endpoint, metrics in sorted(self.endpoints.items())
+            },
+        }
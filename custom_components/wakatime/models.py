@@ -0,0 +1,191 @@
+"""
+Compact records holding only the API fields the integration reads.
+
+Payloads are projected onto these tuples right after decoding, so the large
+raw responses (hundreds of projects, entities, branches, dependencies, ...)
+are dropped immediately instead of being kept in the coordinator and the
+response cache.
+"""
+
+from __future__ import annotations
+
+from typing import Any, NamedTuple
+
+# Ranked lists of the stats endpoint kept in Stats, in field order.
+STATS_DIMENSIONS = (
+    "languages",
+    "projects",
+    "editors",
+    "operating_systems",
+    "categories",
+)
+
+
+class RankedItem(NamedTuple):
+    """An entry of a ranked breakdown such as languages or projects."""
+
+    name: str
+    total_seconds: float
+    percent: float
+
+
+class Stats(NamedTuple):
+    """Projection of users/current/stats."""
+
+    languages: tuple[RankedItem, ...]
+    projects: tuple[RankedItem, ...]
+    editors: tuple[RankedItem, ...]
+    operating_systems: tuple[RankedItem, ...]
+    categories: tuple[RankedItem, ...]
+    best_day_time: str
+
+
+class UserInfo(NamedTuple):
+    """Projection of users/current."""
+
+    id: str
+    email: str | None
+    display_name: str
+
+
+class AllTime(NamedTuple):
+    """Projection of users/current/all_time_since_today."""
+
+    daily_average: float
+    current_streak: int
+    best_streak: int
+    best_streak_range: Any
+
+
+class DayTotal(NamedTuple):
+    """Grand total of a single day."""
+
+    date: str | None
+    total_seconds: float
+    text: str | None
+
+
+class DaySummary(NamedTuple):
+    """One day of users/current/summaries with its (dimension, name, seconds)."""
+
+    total: DayTotal
+    breakdown: tuple[tuple[str, str, float], ...]
+
+
+class Durations(NamedTuple):
+    """Projection of users/current/durations."""
+
+    last_activity: float | None
+
+
+def _ranked(items: list[dict]) -> tuple[RankedItem, ...]:
+    return tuple(
+        RankedItem(
+            item.get("name", ""),
+            float(item.get("total_seconds", 0)),
+            float(item.get("percent", 0)),
+        )
+        for item in items
+    )
+
+
+def parse_stats(payload: dict) -> Stats | None:
+    """Keep the ranked breakdowns and best day of a stats response."""
+    if "data" not in payload:
+        return None
+    stats = payload["data"]
+    return Stats(
+        *(_ranked(stats.get(dimension) or []) for dimension in STATS_DIMENSIONS),
+        best_day_time=(stats.get("best_day") or {}).get("time", ""),
+    )
+
+
+def _wakapi_ranked(items: list[dict]) -> tuple[RankedItem, ...]:
+    total = sum(item.get("total", 0) for item in items)
+    return tuple(
+        RankedItem(
+            item.get("key", ""),
+            float(item.get("total", 0)),
+            item.get("total", 0) * 100 / total if total else 0.0,
+        )
+        for item in sorted(items, key=lambda item: item.get("total", 0), reverse=True)
+    )
+
+
+def parse_wakapi_summary(payload: dict) -> Stats | None:
+    """
+    Build Stats from a summary of Wakapi's native API.
+
+    Its items carry a key and a total in seconds only; percentages are
+    derived and there is no best day.
+    """
+    if "projects" not in payload:
+        return None
+    return Stats(
+        *(
+            _wakapi_ranked(payload.get(dimension) or [])
+            for dimension in STATS_DIMENSIONS
+        ),
+        best_day_time="",
+    )
+
+
+def parse_user_info(payload: dict) -> UserInfo | None:
+    """Keep the identity fields of a users/current response."""
+    if "data" not in payload:
+        return None
+    user = payload["data"]
+    return UserInfo(
+        user.get("id", ""),
+        user.get("email"),
+        user.get("display_name", "Wakatime"),
+    )
+
+
+def parse_all_time(payload: dict) -> AllTime | None:
+    """Keep the averages and streaks of an all_time_since_today response."""
+    if "data" not in payload:
+        return None
+    all_time = payload["data"]
+    return AllTime(
+        all_time.get("daily_average", 0),
+        all_time.get("current_streak", 0),
+        all_time.get("best_streak", 0),
+        all_time.get("best_streak_range", []),
+    )
+
+
+def parse_summaries(payload: dict) -> tuple[DaySummary, ...] | None:
+    """Keep the grand total and per-dimension seconds of each day."""
+    if "data" not in payload:
+        return None
+    return tuple(
+        DaySummary(
+            DayTotal(
+                (day.get("range") or {}).get("date"),
+                float((day.get("grand_total") or {}).get("total_seconds", 0)),
+                (day.get("grand_total") or {}).get("text"),
+            ),
+            tuple(
+                (dimension, item.get("name", ""), float(item.get("total_seconds", 0)))
+                for dimension in STATS_DIMENSIONS
+                for item in day.get(dimension) or []
+            ),
+        )
+        for day in payload["data"]
+    )
+
+
+def parse_durations(payload: dict) -> Durations | None:
+    """Keep only the end of the latest duration."""
+    if "data" not in payload:
+        return None
+    return Durations(
+        max(
+            (
+                duration.get("time", 0) + duration.get("duration", 0)
+                for duration in payload["data"]
+            ),
+            default=None,
+        )
+    )
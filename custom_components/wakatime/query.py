@@ -0,0 +1,75 @@
+"""Result cache of the wakatime.query service."""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from .const import QUERY_CACHE_SIZE
+
+if TYPE_CHECKING:
+    from datetime import date
+
+
+class QueryKey(NamedTuple):
+    """Arguments identifying one query result."""
+
+    start: date
+    end: date
+    dimension: str | None
+    name: str | None
+    limit: int
+
+
+class QueryCache:
+    """
+    Bounded LRU cache of query results with per-entry expiry.
+
+    Results only covering final days never expire and are evicted by
+    recency alone; results covering days still synced (today, yesterday)
+    carry a monotonic expiry. Entries overlapping days a history sync
+    changed are dropped right away.
+    """
+
+    def __init__(self, size: int = QUERY_CACHE_SIZE) -> None:
+        """Initialize an empty cache holding at most size results."""
+        self._size = size
+        self._entries: OrderedDict[QueryKey, tuple[float | None, dict[str, Any]]] = (
+            OrderedDict()
+        )
+
+    def __len__(self) -> int:
+        """Return the number of cached results."""
+        return len(self._entries)
+
+    def get(self, key: QueryKey, now: float) -> dict[str, Any] | None:
+        """Return a cached result unless it is missing or expired."""
+        if (entry := self._entries.get(key)) is None:
+            return None
+        expires, result = entry
+        if expires is not None and expires <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return result
+
+    def put(self, key: QueryKey, result: dict[str, Any], expires: float | None) -> None:
+        """Cache a result, evicting the least recently used ones beyond the size."""
+        self._entries[key] = (expires, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, days: set[date]) -> None:
+        """Drop the results whose range contains one of the days."""
+        if not days:
+            return
+        first, last = min(days), max(days)
+        for key in [
+            key
+            for key in self._entries
+            if key.start <= last
+            and key.end >= first
+            and any(key.start <= day <= key.end for day in days)
+        ]:
+            del self._entries[key]
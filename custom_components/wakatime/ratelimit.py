@@ -0,0 +1,107 @@
+"""Rate limiting shared by every Wakatime client that talks to the same host."""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from typing import TYPE_CHECKING, Any
+
+from yarl import URL
+
+from .const import (
+    BACKOFF_BASE,
+    BACKOFF_MAX,
+    DOMAIN,
+    RATE_LIMIT_BURST,
+    RATE_LIMIT_PER_SECOND,
+)
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
+
+DATA_RATE_LIMITERS = f"{DOMAIN}_rate_limiters"
+
+
+class RateLimiter:
+    """
+    Token bucket with exponential, jittered backoff after throttling.
+
+    Tokens refill continuously at rate per second up to capacity. When the
+    server throttles or fails, the whole bucket is blocked until the backoff
+    delay (or the server's Retry-After) has passed.
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        """Initialize the limiter with a full bucket."""
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._failures = 0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(
+            self._capacity, self._tokens + (now - self._updated) * self._rate
+        )
+        self._updated = now
+
+    @property
+    def blocked_for(self) -> float:
+        """Return the seconds left before requests are allowed again."""
+        return max(self._blocked_until - time.monotonic(), 0.0)
+
+    @property
+    def budget(self) -> dict[str, Any]:
+        """Return the current state of the bucket."""
+        self._refill(time.monotonic())
+        return {
+            "tokens": round(self._tokens, 2),
+            "capacity": self._capacity,
+            "rate": self._rate,
+            "blocked_for": round(self.blocked_for, 2),
+            "failures": self._failures,
+        }
+
+    async def acquire(self) -> None:
+        """Wait until a request may be sent and take a token for it."""
+        while True:
+            now = time.monotonic()
+            if now < self._blocked_until:
+                await asyncio.sleep(self._blocked_until - now)
+                continue
+            self._refill(now)
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self._rate)
+
+    def backoff(self, retry_after: float | None = None) -> float:
+        """
+        Block the bucket after a throttled or failed request.
+
+        Returns the delay in seconds: the server's Retry-After when given,
+        otherwise a full-jitter exponential backoff on consecutive failures.
+        """
+        self._failures += 1
+        if retry_after is None:
+            retry_after = random.uniform(  # noqa: S311
+                0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (self._failures - 1))
+            )
+        self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+        self._tokens = 0
+        return retry_after
+
+    def reset(self) -> None:
+        """Forget consecutive failures after a successful request."""
+        self._failures = 0
+
+
+def get_rate_limiter(hass: HomeAssistant, base_url: str) -> RateLimiter:
+    """Return the limiter shared by all config entries using base_url's host."""
+    limiters: dict[str, RateLimiter] = hass.data.setdefault(DATA_RATE_LIMITERS, {})
+    key = str(URL(base_url).origin())
+    if key not in limiters:
+        limiters[key] = RateLimiter(RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST)
+    return limiters[key]
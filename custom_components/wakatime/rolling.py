@@ -0,0 +1,93 @@
+"""Rolling-window aggregates over the daily coding time series."""
+
+from __future__ import annotations
+
+import bisect
+from datetime import date, timedelta
+from typing import NamedTuple
+
+
+class WindowStats(NamedTuple):
+    """Aggregates of the days of one rolling window ending today."""
+
+    total: float
+    average: float
+    active_days: int
+    # Share of the window's days with less coding time than today, in percent.
+    today_rank: float
+    median: float
+    p90: float
+
+
+class DailySeries:
+    """
+    Daily coding time with prefix sums of time and active days.
+
+    Sums over any window are two lookups in the prefix arrays, and adding a
+    new day or updating today appends to or adjusts the tail only. Changing
+    an older day (e.g. history backfill) recomputes the prefixes from that
+    day on.
+    """
+
+    def __init__(self, start: date, seconds: list[float]) -> None:
+        """Initialize the series with the seconds of each day from start."""
+        self.start = start
+        self._seconds = list(seconds)
+        # _time[i] and _active[i] cover the first i days.
+        self._time = [0.0]
+        self._active = [0]
+        self._build(0)
+
+    def _build(self, index: int) -> None:
+        """Recompute the prefix sums after the day at index."""
+        del self._time[index + 1 :], self._active[index + 1 :]
+        for value in self._seconds[index:]:
+            self._time.append(self._time[-1] + value)
+            self._active.append(self._active[-1] + (value > 0))
+
+    @property
+    def end(self) -> date:
+        """Return the last day of the series."""
+        return self.start + timedelta(days=len(self._seconds) - 1)
+
+    def set(self, day: date, seconds: float) -> None:
+        """Set the coding time of a day, extending the series up to it."""
+        if day < self.start:
+            return
+        index = (day - self.start).days
+        if index >= len(self._seconds):
+            self.extend(day)
+        delta = seconds - self._seconds[index]
+        active = (seconds > 0) - (self._seconds[index] > 0)
+        self._seconds[index] = seconds
+        if index == len(self._seconds) - 1:
+            self._time[-1] += delta
+            self._active[-1] += active
+        else:
+            self._build(index)
+
+    def extend(self, day: date) -> None:
+        """Append days without coding time up to day."""
+        for _ in range((day - self.end).days):
+            self._seconds.append(0.0)
+            self._time.append(self._time[-1])
+            self._active.append(self._active[-1])
+
+    def window(self, end: date, days: int) -> WindowStats:
+        """Return the aggregates of the days-long window ending on end."""
+        stop = max(min((end - self.start).days + 1, len(self._seconds)), 0)
+        begin = max(stop - days, 0)
+        total = self._time[stop] - self._time[begin]
+        active_days = self._active[stop] - self._active[begin]
+
+        # Percentiles need the values themselves; only the window is sorted.
+        ordered = sorted(self._seconds[begin:stop]) or [0.0]
+        today = self._seconds[stop - 1] if stop > 0 else 0.0
+        return WindowStats(
+            total=total,
+            average=total / days,
+            active_days=active_days,
+            today_rank=bisect.bisect_left(ordered, today) * 100 / len(ordered),
+            median=ordered[len(ordered) // 2],
+            p90=ordered[min(len(ordered) * 9 // 10, len(ordered) - 1)],
+        )
@@ -0,0 +1,60 @@
+"""Domain-wide scheduling of Wakatime refreshes across config entries."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import math
+from typing import TYPE_CHECKING
+
+from .const import DOMAIN, MAX_CONCURRENT_REQUESTS
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
+
+DATA_SCHEDULER = f"{DOMAIN}_scheduler"
+
+
+def account_key(api_key: str, base_url: str) -> str:
+    """Return a stable, non-secret key identifying an account on a backend."""
+    digest = hashlib.sha256(f"{base_url.rstrip('/')}|{api_key}".encode())
+    return digest.hexdigest()[:16]
+
+
+class WakatimeScheduler:
+    """
+    Spread the refreshes of all accounts.
+
+    Every account gets a deterministic phase derived from its key, and each
+    endpoint is fetched on a grid shifted by that phase, so accounts polled
+    at the same cadence do not fire at the same moment. A single semaphore
+    caps the requests in flight for the whole domain.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the scheduler."""
+        self.semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+    @staticmethod
+    def phase(key: str) -> float:
+        """Return the account's offset as a fraction of any interval."""
+        return int(key, 16) / 16 ** len(key)
+
+    @staticmethod
+    def next_due(now: float, interval: float, phase: float) -> float:
+        """
+        Return the first slot of the phase-shifted grid at least interval/2 away.
+
+        Requiring half an interval keeps the cadence close to interval even
+        right after an unscheduled refresh.
+        """
+        offset = phase * interval
+        slot = math.ceil((now + interval / 2 - offset) / interval)
+        return slot * interval + offset
+
+
+def get_scheduler(hass: HomeAssistant) -> WakatimeScheduler:
+    """Return the domain-wide scheduler."""
+    if DATA_SCHEDULER not in hass.data:
+        hass.data[DATA_SCHEDULER] = WakatimeScheduler()
+    return hass.data[DATA_SCHEDULER]
@@ -3,7 +3,9 @@
 from __future__ import annotations
 
 import logging
-from typing import Any
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
 
 from homeassistant.components.sensor import (
     SensorDeviceClass,
@@ -12,16 +14,23 @@ from homeassistant.components.sensor import (
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import UnitOfTime
-from homeassistant.core import HomeAssistant
+from homeassistant.const import PERCENTAGE, EntityCategory, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.typing import StateType
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import dt as dt_util
 
-from . import WakatimeDataUpdateCoordinator
 from .const import (
+    CONF_ITEM_MIN_PERCENT,
+    CONF_ITEM_SENSORS,
+    CONF_RECORD_ATTRIBUTES,
+    CONF_ROLLING_WINDOWS,
+    DEFAULT_ITEM_MIN_PERCENT,
+    DEFAULT_ITEM_SENSORS,
     DOMAIN,
     ICON_ACTIVE_TIME,
+    ICON_API,
     ICON_CATEGORY,
     ICON_CODING,
     ICON_EDITOR,
@@ -30,74 +39,273 @@ from .const import (
     ICON_PRODUCTIVITY,
     ICON_PROJECT,
     ICON_STREAK,
+    ICON_TIME,
     ICON_WEEKLY,
 )
+from .entity import WakatimeEntity
+from .snapshot import WakatimeSnapshot
+
+if TYPE_CHECKING:
+    from . import WakatimeDataUpdateCoordinator
+    from .metrics import ApiMetrics
 
 _LOGGER = logging.getLogger(__name__)
 
-SENSOR_TYPES: tuple[SensorEntityDescription, ...] = (
-    SensorEntityDescription(
+
+@dataclass(frozen=True, kw_only=True)
+class WakatimeSensorEntityDescription(SensorEntityDescription):
+    """Describes a Wakatime sensor."""
+
+    dataset: str
+    value_fn: Callable[[WakatimeSnapshot], StateType]
+    attr_fn: Callable[[WakatimeSnapshot], dict[str, Any]] = lambda _: {}
+
+
+@dataclass(frozen=True, kw_only=True)
+class WakatimeDiagnosticSensorEntityDescription(SensorEntityDescription):
+    """Describes a Wakatime sensor reporting the client's request metrics."""
+
+    dataset: None = None
+    value_fn: Callable[[ApiMetrics], StateType]
+    attr_fn: Callable[[ApiMetrics], dict[str, Any]] = lambda _: {}
+
+
+def _attributes(**attributes: Any) -> dict[str, Any]:
+    """Return the attributes that are present in the snapshot."""
+    return {name: value for name, value in attributes.items() if value is not None}
+
+
+SENSOR_TYPES: tuple[WakatimeSensorEntityDescription, ...] = (
+    WakatimeSensorEntityDescription(
         key="daily_total",
+        dataset="summary",
         translation_key="daily_total",
         native_unit_of_measurement=UnitOfTime.SECONDS,
         device_class=SensorDeviceClass.DURATION,
         state_class=SensorStateClass.TOTAL,
         icon=ICON_CODING,
+        value_fn=lambda snap: snap.daily_total,
+        attr_fn=lambda snap: _attributes(human_readable_time=snap.daily_total_text),
     ),
-    SensorEntityDescription(
+    WakatimeSensorEntityDescription(
         key="top_language",
+        dataset="stats",
         translation_key="top_language",
         icon=ICON_LANGUAGE,
+        value_fn=lambda snap: snap.top_language,
+        attr_fn=lambda snap: _attributes(other_languages=snap.other_languages),
     ),
-    SensorEntityDescription(
+    WakatimeSensorEntityDescription(
         key="top_project",
+        dataset="stats",
         translation_key="top_project",
         icon=ICON_PROJECT,
+        value_fn=lambda snap: snap.top_project,
+        attr_fn=lambda snap: _attributes(other_projects=snap.other_projects),
     ),
-    SensorEntityDescription(
+    WakatimeSensorEntityDescription(
         key="top_editor",
+        dataset="stats",
         translation_key="top_editor",
         icon=ICON_EDITOR,
+        value_fn=lambda snap: snap.top_editor,
     ),
-    SensorEntityDescription(
+    WakatimeSensorEntityDescription(
         key="top_os",
+        dataset="stats",
         translation_key="top_operating_system",
         icon=ICON_OPERATING_SYSTEM,
+        value_fn=lambda snap: snap.top_os,
     ),
     # New sensor types
-    SensorEntityDescription(
+    WakatimeSensorEntityDescription(
         key="top_category",
+        dataset="stats",
         translation_key="top_category",
         icon=ICON_CATEGORY,
+        value_fn=lambda snap: snap.top_category,
     ),
-    SensorEntityDescription(
+    WakatimeSensorEntityDescription(
         key="weekly_average",
+        dataset="last_7_days",
         translation_key="weekly_average",
         native_unit_of_measurement=UnitOfTime.SECONDS,
         device_class=SensorDeviceClass.DURATION,
         state_class=SensorStateClass.MEASUREMENT,
         icon=ICON_WEEKLY,
+        value_fn=lambda snap: snap.weekly_average,
+        attr_fn=lambda snap: _attributes(
+            human_readable_time=snap.weekly_average_text,
+            days_with_activity=snap.days_with_activity,
+        ),
     ),
-    SensorEntityDescription(
+    WakatimeSensorEntityDescription(
         key="productivity_level",
+        dataset="all_time",
         translation_key="productivity_level",
         icon=ICON_PRODUCTIVITY,
+        value_fn=lambda snap: snap.productivity_level,
     ),
-    SensorEntityDescription(
+    WakatimeSensorEntityDescription(
         key="most_active_time",
+        dataset="stats",
         translation_key="most_active_time",
         icon=ICON_ACTIVE_TIME,
+        value_fn=lambda snap: snap.most_active_time,
     ),
-    SensorEntityDescription(
+    WakatimeSensorEntityDescription(
         key="current_streak",
+        dataset="all_time",
         translation_key="current_streak",
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement="days",
         icon=ICON_STREAK,
+        value_fn=lambda snap: snap.current_streak,
+        attr_fn=lambda snap: _attributes(
+            best_streak=snap.best_streak,
+            best_streak_range=snap.best_streak_range,
+        ),
+    ),
+    WakatimeSensorEntityDescription(
+        key="live_total",
+        dataset="heartbeats",
+        translation_key="live_total",
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        icon=ICON_CODING,
+        # Only useful once editors send heartbeats to Home Assistant.
+        entity_registry_enabled_default=False,
+        value_fn=lambda snap: snap.live_total,
+        attr_fn=lambda snap: _attributes(
+            last_heartbeat=(
+                dt_util.utc_from_timestamp(snap.last_heartbeat).isoformat()
+                if snap.last_heartbeat
+                else None
+            ),
+            project=snap.live_project,
+            language=snap.live_language,
+        ),
     ),
 )
 
 
+DIAGNOSTIC_SENSOR_TYPES: tuple[WakatimeDiagnosticSensorEntityDescription, ...] = (
+    WakatimeDiagnosticSensorEntityDescription(
+        key="refresh_latency",
+        translation_key="refresh_latency",
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=2,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        icon=ICON_TIME,
+        value_fn=lambda metrics: metrics.refresh.percentile(95),
+        attr_fn=lambda metrics: _attributes(
+            median=metrics.refresh.percentile(50),
+            refreshes=sum(metrics.refresh.counts),
+            failures=metrics.refresh_failures,
+        ),
+    ),
+    WakatimeDiagnosticSensorEntityDescription(
+        key="api_calls",
+        translation_key="api_calls",
+        native_unit_of_measurement="calls/h",
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        icon=ICON_API,
+        value_fn=lambda metrics: metrics.last_hour()["calls"],
+        attr_fn=lambda metrics: {
+            key: value for key, value in metrics.last_hour().items() if key != "calls"
+        },
+    ),
+)
+
+
+def _rolling_value(snap: WakatimeSnapshot, days: int, field: str) -> Any:
+    """Return one aggregate of a rolling window from the snapshot."""
+    return ((snap.rolling or {}).get(str(days)) or {}).get(field)
+
+
+def _rolling_descriptions(days: int) -> tuple[WakatimeSensorEntityDescription, ...]:
+    """Return the descriptions of the sensors of a rolling window."""
+    placeholders = {"days": str(days)}
+    return (
+        WakatimeSensorEntityDescription(
+            key=f"rolling_{days}_total",
+            dataset="rolling",
+            translation_key="rolling_total",
+            translation_placeholders=placeholders,
+            native_unit_of_measurement=UnitOfTime.SECONDS,
+            device_class=SensorDeviceClass.DURATION,
+            state_class=SensorStateClass.MEASUREMENT,
+            icon=ICON_CODING,
+            value_fn=lambda snap: _rolling_value(snap, days, "total"),
+        ),
+        WakatimeSensorEntityDescription(
+            key=f"rolling_{days}_average",
+            dataset="rolling",
+            translation_key="rolling_average",
+            translation_placeholders=placeholders,
+            native_unit_of_measurement=UnitOfTime.SECONDS,
+            device_class=SensorDeviceClass.DURATION,
+            state_class=SensorStateClass.MEASUREMENT,
+            icon=ICON_WEEKLY,
+            value_fn=lambda snap: _rolling_value(snap, days, "average"),
+            attr_fn=lambda snap: _attributes(
+                median=_rolling_value(snap, days, "median"),
+                p90=_rolling_value(snap, days, "p90"),
+            ),
+        ),
+        WakatimeSensorEntityDescription(
+            key=f"rolling_{days}_active_days",
+            dataset="rolling",
+            translation_key="rolling_active_days",
+            translation_placeholders=placeholders,
+            native_unit_of_measurement="days",
+            state_class=SensorStateClass.MEASUREMENT,
+            icon=ICON_STREAK,
+            value_fn=lambda snap: _rolling_value(snap, days, "active_days"),
+        ),
+        WakatimeSensorEntityDescription(
+            key=f"rolling_{days}_today_rank",
+            dataset="rolling",
+            translation_key="rolling_today_rank",
+            translation_placeholders=placeholders,
+            native_unit_of_measurement=PERCENTAGE,
+            state_class=SensorStateClass.MEASUREMENT,
+            suggested_display_precision=0,
+            icon=ICON_PRODUCTIVITY,
+            value_fn=lambda snap: _rolling_value(snap, days, "today_rank"),
+        ),
+    )
+
+
+# Snapshot field, translation key and icon of the per-item sensors, by key prefix.
+ITEM_SENSOR_TYPES: dict[str, tuple[str, str, str]] = {
+    "language": ("language_seconds", "language_time", ICON_LANGUAGE),
+    "project": ("project_seconds", "project_time", ICON_PROJECT),
+}
+
+
+def _item_description(prefix: str, name: str) -> WakatimeSensorEntityDescription:
+    """Return the description of the duration sensor of one project or language."""
+    field, translation_key, icon = ITEM_SENSOR_TYPES[prefix]
+    return WakatimeSensorEntityDescription(
+        key=f"{prefix}_{name}",
+        dataset="stats",
+        translation_key=translation_key,
+        translation_placeholders={"item": name},
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon=icon,
+        value_fn=lambda snap: (getattr(snap, field) or {}).get(name),
+    )
+
+
 async def async_setup_entry(
     hass: HomeAssistant,
     entry: ConfigEntry,
@@ -105,245 +313,201 @@ async def async_setup_entry(
 ) -> None:
     """Set up Wakatime sensor based on a config entry."""
     coordinator = hass.data[DOMAIN][entry.entry_id]
+    sensor_class = (
+        WakatimeRecordedSensor
+        if entry.options.get(CONF_RECORD_ATTRIBUTES, False)
+        else WakatimeSensor
+    )
 
     async_add_entities(
-        WakatimeSensor(
+        sensor_class(
             coordinator=coordinator,
             entity_description=entity_description,
+            entry_id=entry.entry_id,
         )
         for entity_description in SENSOR_TYPES
+        if coordinator.fetches(entity_description.dataset)
+    )
+    if coordinator.fetches("rolling"):
+        async_add_entities(
+            WakatimeSensor(
+                coordinator=coordinator,
+                entity_description=entity_description,
+                entry_id=entry.entry_id,
+            )
+            for days in sorted(
+                int(days) for days in entry.options.get(CONF_ROLLING_WINDOWS, [])
+            )
+            for entity_description in _rolling_descriptions(days)
+        )
+    async_add_entities(
+        WakatimeDiagnosticSensor(
+            coordinator=coordinator,
+            entity_description=entity_description,
+            entry_id=entry.entry_id,
+        )
+        for entity_description in DIAGNOSTIC_SENSOR_TYPES
     )
 
+    items = WakatimeItemSensors(hass, entry, coordinator, async_add_entities)
+    items.async_remove_orphans()
+    items.async_update()
+    entry.async_on_unload(coordinator.async_add_listener(items.async_update))
 
-class WakatimeSensor(CoordinatorEntity, SensorEntity):
-    """Representation of a Wakatime sensor."""
 
-    coordinator: WakatimeDataUpdateCoordinator
-    _attr_has_entity_name = True
+class WakatimeItemSensors:
+    """
+    Keep one duration sensor per top project and language.
+
+    The wanted items are diffed against the current sensors on every stats
+    update: only new items get an entity and only items that left the
+    selection are removed, so unchanged sensors are never re-registered.
+    """
 
     def __init__(
         self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
         coordinator: WakatimeDataUpdateCoordinator,
-        entity_description: SensorEntityDescription,
+        async_add_entities: AddEntitiesCallback,
     ) -> None:
-        """Initialize the sensor."""
-        super().__init__(coordinator)
-        self.entity_description = entity_description
-        self._attr_unique_id = f"{DOMAIN}_{entity_description.key}"
-
-        if "user_info" in coordinator.data and "data" in coordinator.data["user_info"]:
-            user = coordinator.data["user_info"]["data"]
-            self._attr_device_info = {
-                "identifiers": {(DOMAIN, user.get("id", ""))},
-                "name": user.get("display_name", "Wakatime"),
-                "manufacturer": "Wakatime",
-                "model": "API",
+        """Initialize the manager without any sensors."""
+        self._hass = hass
+        self._entry = entry
+        self._coordinator = coordinator
+        self._async_add_entities = async_add_entities
+        self._top = entry.options.get(CONF_ITEM_SENSORS, DEFAULT_ITEM_SENSORS)
+        self._min_percent = entry.options.get(
+            CONF_ITEM_MIN_PERCENT, DEFAULT_ITEM_MIN_PERCENT
+        )
+        self._entities: dict[str, WakatimeSensor] = {}
+        if not coordinator.fetches("stats"):
+            self._top = 0
+        elif self._top:
+            # Items are only known from stats; keep fetching it for them.
+            coordinator.entity_datasets[f"{entry.entry_id}_items"] = "stats"
+
+    def _wanted(self) -> set[str]:
+        """Return the keys of the items that should have a sensor."""
+        wanted = set()
+        if not self._top:
+            return wanted
+        for prefix, (field, _, _) in ITEM_SENSOR_TYPES.items():
+            items = getattr(self._coordinator.snapshot, field) or {}
+            total = sum(items.values())
+            wanted.update(
+                f"{prefix}_{name}"
+                for name, seconds in list(items.items())[: self._top]
+                if total and seconds * 100 / total >= self._min_percent
+            )
+        return wanted
+
+    @callback
+    def async_remove_orphans(self) -> None:
+        """
+        Remove registry entries of item sensors that are no longer wanted.
+
+        Covers items that left the selection while Home Assistant was not
+        running and sensors left behind after the options changed. Nothing is
+        removed while the stats are unknown (e.g. their fetch failed), since
+        every item would look unwanted then.
+        """
+        if self._top and "stats" not in self._coordinator.snapshot.datasets:
+            return
+        registry = er.async_get(self._hass)
+        wanted = {f"{self._entry.entry_id}_{key}" for key in self._wanted()}
+        prefixes = tuple(
+            f"{self._entry.entry_id}_{prefix}_" for prefix in ITEM_SENSOR_TYPES
+        )
+        for registry_entry in er.async_entries_for_config_entry(
+            registry, self._entry.entry_id
+        ):
+            if (
+                registry_entry.domain == "sensor"
+                and registry_entry.unique_id.startswith(prefixes)
+                and registry_entry.unique_id not in wanted
+            ):
+                registry.async_remove(registry_entry.entity_id)
+
+    @callback
+    def async_update(self) -> None:
+        """Add sensors for new items and remove those of items that left."""
+        if self._entities and "stats" not in self._coordinator.changed_datasets:
+            return
+        wanted = self._wanted()
+        current = self._entities.keys()
+
+        if added := wanted - current:
+            new_entities = {
+                key: WakatimeSensor(
+                    coordinator=self._coordinator,
+                    entity_description=_item_description(*key.split("_", 1)),
+                    entry_id=self._entry.entry_id,
+                )
+                for key in added
             }
+            self._entities.update(new_entities)
+            self._async_add_entities(new_entities.values())
+
+        registry = er.async_get(self._hass)
+        for key in current - wanted:
+            entity = self._entities.pop(key)
+            if entity.entity_id and registry.async_get(entity.entity_id):
+                # Removing the registry entry also removes the entity.
+                registry.async_remove(entity.entity_id)
+            else:
+                self._hass.async_create_task(entity.async_remove())
+
+
+class WakatimeSensor(WakatimeEntity, SensorEntity):
+    """Representation of a Wakatime sensor."""
+
+    # Lists rewritten with every stats update; they made up most of the
+    # recorded attributes, so they are only part of the live state.
+    _unrecorded_attributes = frozenset(
+        {"other_languages", "other_projects", "best_streak_range"}
+    )
+
+    entity_description: WakatimeSensorEntityDescription
 
     @property
     def native_value(self) -> StateType:
         """Return the state of the sensor."""
-        if not self.coordinator.data:
-            return None
+        return self.entity_description.value_fn(self.coordinator.snapshot)
 
-        if self.entity_description.key == "daily_total":
-            if (
-                "summary" in self.coordinator.data
-                and "data" in self.coordinator.data["summary"]
-            ):
-                for day in self.coordinator.data["summary"]["data"]:
-                    if "grand_total" in day:
-                        seconds = day["grand_total"].get("total_seconds", 0)
-                        return int(seconds)
-            return 0
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return entity specific state attributes."""
+        attributes = self.entity_description.attr_fn(self.coordinator.snapshot)
+        if self.coordinator.stale:
+            attributes["stale"] = True
+        fetched_at = self.coordinator.stale_since(self.entity_description.dataset)
+        if fetched_at is not None:
+            # A fixed timestamp rather than an age, so retries do not rewrite it.
+            attributes["stale"] = True
+            attributes["last_fetched"] = dt_util.utc_from_timestamp(
+                fetched_at
+            ).isoformat()
+        return attributes
 
-        if self.entity_description.key == "top_language":
-            if (
-                "stats" in self.coordinator.data
-                and "data" in self.coordinator.data["stats"]
-            ):
-                languages = self.coordinator.data["stats"]["data"].get("languages", [])
-                if languages:
-                    return languages[0].get("name", "Unknown")
-            return "Unknown"
 
-        if self.entity_description.key == "top_project":
-            if (
-                "stats" in self.coordinator.data
-                and "data" in self.coordinator.data["stats"]
-            ):
-                projects = self.coordinator.data["stats"]["data"].get("projects", [])
-                if projects:
-                    return projects[0].get("name", "Unknown")
-            return "Unknown"
+class WakatimeRecordedSensor(WakatimeSensor):
+    """Wakatime sensor recording all of its attributes."""
 
-        if self.entity_description.key == "top_editor":
-            if (
-                "stats" in self.coordinator.data
-                and "data" in self.coordinator.data["stats"]
-            ):
-                editors = self.coordinator.data["stats"]["data"].get("editors", [])
-                if editors:
-                    return editors[0].get("name", "Unknown")
-            return "Unknown"
+    _unrecorded_attributes = frozenset()
 
-        if self.entity_description.key == "top_os":
-            if (
-                "stats" in self.coordinator.data
-                and "data" in self.coordinator.data["stats"]
-            ):
-                operating_systems = self.coordinator.data["stats"]["data"].get(
-                    "operating_systems", []
-                )
-                if operating_systems:
-                    return operating_systems[0].get("name", "Unknown")
-            return "Unknown"
 
-        # New sensor implementations
-        if self.entity_description.key == "top_category":
-            if (
-                "stats" in self.coordinator.data
-                and "data" in self.coordinator.data["stats"]
-            ):
-                categories = self.coordinator.data["stats"]["data"].get(
-                    "categories", []
-                )
-                if categories:
-                    return categories[0].get("name", "Unknown")
-            return "Unknown"
+class WakatimeDiagnosticSensor(WakatimeEntity, SensorEntity):
+    """Sensor reporting request metrics, updated after every refresh."""
 
-        if self.entity_description.key == "weekly_average":
-            if (
-                "last_7_days" in self.coordinator.data
-                and "data" in self.coordinator.data["last_7_days"]
-            ):
-                days = self.coordinator.data["last_7_days"]["data"]
-                if days:
-                    total_seconds = sum(
-                        day["grand_total"].get("total_seconds", 0)
-                        for day in days
-                        if "grand_total" in day
-                    )
-                    return int(total_seconds / 7)  # Average per day
-            return 0
-
-        if self.entity_description.key == "productivity_level":
-            if (
-                "all_time" in self.coordinator.data
-                and "data" in self.coordinator.data["all_time"]
-            ):
-                daily_avg = self.coordinator.data["all_time"]["data"].get(
-                    "daily_average", 0
-                )
-                if daily_avg:
-                    # Determine productivity level based on daily average coding time
-                    if daily_avg > 14400:  # More than 4 hours
-                        return "High"
-                    if daily_avg > 7200:  # More than 2 hours
-                        return "Medium"
-                    return "Low"
-            return "Unknown"
-
-        if self.entity_description.key == "most_active_time":
-            if (
-                "stats" in self.coordinator.data
-                and "data" in self.coordinator.data["stats"]
-            ):
-                best_hour = (
-                    self.coordinator.data["stats"]["data"]
-                    .get("best_day", {})
-                    .get("time", "")
-                )
-                return best_hour or "Unknown"
-            return "Unknown"
-
-        if self.entity_description.key == "current_streak":
-            if (
-                "all_time" in self.coordinator.data
-                and "data" in self.coordinator.data["all_time"]
-            ):
-                current_streak = self.coordinator.data["all_time"]["data"].get(
-                    "current_streak", 0
-                )
-                return current_streak
-            return 0
+    entity_description: WakatimeDiagnosticSensorEntityDescription
 
-        return None
+    @property
+    def native_value(self) -> StateType:
+        """Return the state of the sensor."""
+        return self.entity_description.value_fn(self.coordinator.client.metrics)
 
     @property
     def extra_state_attributes(self) -> dict[str, Any] | None:
         """Return entity specific state attributes."""
-        if not self.coordinator.data:
-            return None
-
-        attributes = {}
-
-        if self.entity_description.key == "daily_total":
-            if (
-                "summary" in self.coordinator.data
-                and "data" in self.coordinator.data["summary"]
-            ):
-                for day in self.coordinator.data["summary"]["data"]:
-                    if "grand_total" in day:
-                        attributes["human_readable_time"] = day["grand_total"].get(
-                            "text", "0 mins"
-                        )
-
-        elif self.entity_description.key == "top_language":
-            if (
-                "stats" in self.coordinator.data
-                and "data" in self.coordinator.data["stats"]
-            ):
-                languages = self.coordinator.data["stats"]["data"].get("languages", [])
-                if languages and len(languages) > 1:
-                    attributes["other_languages"] = [
-                        {"name": lang.get("name"), "percent": lang.get("percent")}
-                        for lang in languages[1:5]  # Include top 5 languages
-                    ]
-
-        elif self.entity_description.key == "top_project":
-            if (
-                "stats" in self.coordinator.data
-                and "data" in self.coordinator.data["stats"]
-            ):
-                projects = self.coordinator.data["stats"]["data"].get("projects", [])
-                if projects and len(projects) > 1:
-                    attributes["other_projects"] = [
-                        {"name": proj.get("name"), "percent": proj.get("percent")}
-                        for proj in projects[1:5]  # Include top 5 projects
-                    ]
-
-        # Add attributes for the new sensors
-        elif self.entity_description.key == "weekly_average":
-            if (
-                "last_7_days" in self.coordinator.data
-                and "data" in self.coordinator.data["last_7_days"]
-            ):
-                days = self.coordinator.data["last_7_days"]["data"]
-                if days:
-                    total_seconds = sum(
-                        day["grand_total"].get("total_seconds", 0)
-                        for day in days
-                        if "grand_total" in day
-                    )
-                    attributes["human_readable_time"] = (
-                        f"{int(total_seconds / 7 / 60)} mins"
-                    )
-                    attributes["days_with_activity"] = len(
-                        [
-                            day
-                            for day in days
-                            if day.get("grand_total", {}).get("total_seconds", 0) > 0
-                        ]
-                    )
-
-        elif self.entity_description.key == "current_streak":
-            if (
-                "all_time" in self.coordinator.data
-                and "data" in self.coordinator.data["all_time"]
-            ):
-                all_time = self.coordinator.data["all_time"]["data"]
-                attributes["best_streak"] = all_time.get("best_streak", 0)
-                attributes["best_streak_range"] = all_time.get("best_streak_range", [])
-
-        return attributes
+        return self.entity_description.attr_fn(self.coordinator.client.metrics)
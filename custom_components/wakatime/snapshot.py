@@ -0,0 +1,255 @@
+"""Compact per-refresh snapshot of the values exposed by Wakatime sensors."""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, fields, replace
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+    from .heartbeat import LiveActivity
+    from .models import AllTime, DayTotal, Durations, RankedItem, Stats, UserInfo
+    from .rolling import WindowStats
+
+UNKNOWN = "Unknown"
+
+
+@dataclass(frozen=True, slots=True)
+class WakatimeSnapshot:
+    """Sensor values and attributes extracted once per coordinator refresh."""
+
+    datasets: frozenset[str] = frozenset()
+
+    # user_info
+    user_id: str | None = None
+    display_name: str | None = None
+
+    # summary
+    daily_total: int | None = None
+    daily_total_text: str | None = None
+
+    # stats
+    top_language: str | None = None
+    other_languages: list[dict[str, Any]] | None = None
+    top_project: str | None = None
+    other_projects: list[dict[str, Any]] | None = None
+    # Seconds per item, in ranking order
+    language_seconds: dict[str, float] | None = None
+    project_seconds: dict[str, float] | None = None
+    top_editor: str | None = None
+    top_os: str | None = None
+    top_category: str | None = None
+    most_active_time: str | None = None
+
+    # last_7_days
+    weekly_average: int | None = None
+    weekly_average_text: str | None = None
+    days_with_activity: int | None = None
+
+    # all_time
+    productivity_level: str | None = None
+    current_streak: int | None = None
+    best_streak: int | None = None
+    best_streak_range: Any = None
+
+    # rolling: window length in days -> WindowStats fields
+    rolling: dict[str, dict[str, float]] | None = None
+
+    # durations
+    last_activity: float | None = None
+
+    # heartbeats
+    live_total: int | None = None
+    last_heartbeat: float | None = None
+    live_project: str | None = None
+    live_language: str | None = None
+
+    @classmethod
+    def from_data(cls, data: dict[str, Any] | None) -> WakatimeSnapshot:
+        """Build a snapshot from the raw coordinator datasets."""
+        if not data:
+            return cls()
+        return cls().update(data, data)
+
+    @classmethod
+    def from_dict(cls, stored: dict[str, Any]) -> WakatimeSnapshot:
+        """Restore a snapshot saved with as_dict, ignoring unknown fields."""
+        names = {field.name for field in fields(cls)}
+        values = {name: value for name, value in stored.items() if name in names}
+        values["datasets"] = frozenset(values.get("datasets", ()))
+        return cls(**values)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a JSON serializable form of the snapshot."""
+        stored = asdict(self)
+        stored["datasets"] = sorted(self.datasets)
+        return stored
+
+    def update(
+        self,
+        data: dict[str, Any],
+        changed: Iterable[str],
+        kept: Iterable[str] = (),
+    ) -> WakatimeSnapshot:
+        """
+        Return a copy with only the changed datasets re-extracted.
+
+        Fields of datasets missing from data are kept, but the dataset is
+        dropped from datasets so sensors reading it report unavailable,
+        unless it is listed in kept.
+        """
+        values: dict[str, Any] = {}
+        for name in changed:
+            if name in data and (extractor := DATASET_EXTRACTORS.get(name)):
+                values.update(dict.fromkeys(DATASET_FIELDS[name]))
+                values.update(extractor(data[name]))
+        return replace(self, datasets=frozenset((*data, *kept)), **values)
+
+
+def _top_name(items: tuple[RankedItem, ...]) -> str:
+    """Return the name of the first item of a ranked breakdown."""
+    if items:
+        return items[0].name
+    return UNKNOWN
+
+
+def _others(items: tuple[RankedItem, ...]) -> list[dict[str, Any]] | None:
+    """Return name and percent of the runners-up of a ranked breakdown."""
+    if len(items) > 1:
+        return [
+            {"name": item.name, "percent": item.percent}
+            for item in items[1:5]  # Include top 5
+        ]
+    return None
+
+
+def _extract_user_info(user: UserInfo | None) -> dict[str, Any]:
+    if user is None:
+        return {}
+    return {"user_id": user.id, "display_name": user.display_name}
+
+
+def _extract_summary(days: tuple[DayTotal, ...] | None) -> dict[str, Any]:
+    if not days:
+        return {"daily_total": 0}
+    return {
+        "daily_total": int(days[0].total_seconds),
+        "daily_total_text": days[-1].text or "0 mins",
+    }
+
+
+def _extract_stats(stats: Stats | None) -> dict[str, Any]:
+    if stats is None:
+        return {
+            "top_language": UNKNOWN,
+            "top_project": UNKNOWN,
+            "top_editor": UNKNOWN,
+            "top_os": UNKNOWN,
+            "top_category": UNKNOWN,
+            "most_active_time": UNKNOWN,
+        }
+    return {
+        "top_language": _top_name(stats.languages),
+        "other_languages": _others(stats.languages),
+        "top_project": _top_name(stats.projects),
+        "other_projects": _others(stats.projects),
+        "language_seconds": {item.name: item.total_seconds for item in stats.languages},
+        "project_seconds": {item.name: item.total_seconds for item in stats.projects},
+        "top_editor": _top_name(stats.editors),
+        "top_os": _top_name(stats.operating_systems),
+        "top_category": _top_name(stats.categories),
+        "most_active_time": stats.best_day_time or UNKNOWN,
+    }
+
+
+def _extract_last_7_days(days: tuple[DayTotal, ...] | None) -> dict[str, Any]:
+    if not days:
+        return {"weekly_average": 0}
+    total_seconds = sum(day.total_seconds for day in days)
+    return {
+        "weekly_average": int(total_seconds / 7),  # Average per day
+        "weekly_average_text": f"{int(total_seconds / 7 / 60)} mins",
+        "days_with_activity": sum(1 for day in days if day.total_seconds > 0),
+    }
+
+
+def _extract_all_time(all_time: AllTime | None) -> dict[str, Any]:
+    if all_time is None:
+        return {"productivity_level": UNKNOWN, "current_streak": 0}
+    daily_avg = all_time.daily_average
+    # Determine productivity level based on daily average coding time
+    if not daily_avg:
+        level = UNKNOWN
+    elif daily_avg > 14400:  # More than 4 hours
+        level = "High"
+    elif daily_avg > 7200:  # More than 2 hours
+        level = "Medium"
+    else:
+        level = "Low"
+    return {
+        "productivity_level": level,
+        "current_streak": all_time.current_streak,
+        "best_streak": all_time.best_streak,
+        "best_streak_range": all_time.best_streak_range,
+    }
+
+
+def _extract_rolling(windows: dict[int, WindowStats]) -> dict[str, Any]:
+    return {"rolling": {str(days): stats._asdict() for days, stats in windows.items()}}
+
+
+def _extract_durations(durations: Durations | None) -> dict[str, Any]:
+    if durations is None:
+        return {}
+    return {"last_activity": durations.last_activity}
+
+
+def _extract_heartbeats(live: LiveActivity | None) -> dict[str, Any]:
+    if live is None:
+        return {}
+    return {
+        "live_total": live.total_seconds,
+        "last_heartbeat": live.last_heartbeat,
+        "live_project": live.project,
+        "live_language": live.language,
+    }
+
+
+DATASET_EXTRACTORS: dict[str, Callable[[Any], dict[str, Any]]] = {
+    "user_info": _extract_user_info,
+    "summary": _extract_summary,
+    "stats": _extract_stats,
+    "last_7_days": _extract_last_7_days,
+    "all_time": _extract_all_time,
+    "rolling": _extract_rolling,
+    "durations": _extract_durations,
+    "heartbeats": _extract_heartbeats,
+}
+
+DATASET_FIELDS: dict[str, tuple[str, ...]] = {
+    "user_info": ("user_id", "display_name"),
+    "summary": ("daily_total", "daily_total_text"),
+    "stats": (
+        "top_language",
+        "other_languages",
+        "top_project",
+        "other_projects",
+        "language_seconds",
+        "project_seconds",
+        "top_editor",
+        "top_os",
+        "top_category",
+        "most_active_time",
+    ),
+    "last_7_days": ("weekly_average", "weekly_average_text", "days_with_activity"),
+    "all_time": (
+        "productivity_level",
+        "current_streak",
+        "best_streak",
+        "best_streak_range",
+    ),
+    "rolling": ("rolling",),
+    "durations": ("last_activity",),
+    "heartbeats": ("live_total", "last_heartbeat", "live_project", "live_language"),
+}
@@ -0,0 +1,97 @@
+"""HTTP sessions owned by the integration, pooled per API host."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+import aiohttp
+from aiohttp import hdrs
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.helpers.aiohttp_client import SERVER_SOFTWARE
+from homeassistant.util.ssl import client_context
+from yarl import URL
+
+from .const import (
+    DOMAIN,
+    HTTP_DNS_CACHE_TTL,
+    HTTP_KEEPALIVE_TIMEOUT,
+    MAX_CONCURRENT_REQUESTS,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from homeassistant.core import Event, HomeAssistant
+
+DATA_SESSIONS = f"{DOMAIN}_sessions"
+
+
+@dataclass(slots=True)
+class _PooledSession:
+    """A host's session and the users keeping it open."""
+
+    session: aiohttp.ClientSession
+    users: set[str] = field(default_factory=set)
+    unsub_close: Callable[[], None] | None = None
+
+
+def _create_session() -> aiohttp.ClientSession:
+    """
+    Return a session with a connector tuned for a single API host.
+
+    Connections are kept alive across the requests of a refresh (and its
+    retries and history chunks) instead of paying a TLS handshake each,
+    DNS answers are cached, and the pool is capped at the number of
+    requests the scheduler lets run at once.
+    """
+    connector = aiohttp.TCPConnector(
+        limit_per_host=MAX_CONCURRENT_REQUESTS,
+        ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+        keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+        enable_cleanup_closed=True,
+        ssl=client_context(),
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        headers={
+            hdrs.USER_AGENT: SERVER_SOFTWARE,
+            hdrs.ACCEPT_ENCODING: "gzip, deflate",
+        },
+    )
+
+
+def async_get_session(
+    hass: HomeAssistant, base_url: str, user: str
+) -> aiohttp.ClientSession:
+    """Return the session of base_url's host and register user as using it."""
+    sessions: dict[str, _PooledSession] = hass.data.setdefault(DATA_SESSIONS, {})
+    key = str(URL(base_url).origin())
+    if (pooled := sessions.get(key)) is None or pooled.session.closed:
+        pooled = sessions[key] = _PooledSession(_create_session())
+
+        async def _async_close(_event: Event) -> None:
+            pooled.unsub_close = None
+            await pooled.session.close()
+
+        # Entries are not unloaded when Home Assistant stops.
+        pooled.unsub_close = hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_CLOSE, _async_close
+        )
+    pooled.users.add(user)
+    return pooled.session
+
+
+async def async_release_session(hass: HomeAssistant, base_url: str, user: str) -> None:
+    """Unregister user, closing the host's session once nobody uses it."""
+    sessions: dict[str, _PooledSession] = hass.data.get(DATA_SESSIONS, {})
+    key = str(URL(base_url).origin())
+    if (pooled := sessions.get(key)) is None:
+        return
+    pooled.users.discard(user)
+    if pooled.users:
+        return
+    del sessions[key]
+    if pooled.unsub_close is not None:
+        pooled.unsub_close()
+    await pooled.session.close()
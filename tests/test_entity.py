@@ -0,0 +1,74 @@
+"""Tests of the state writes of the base entity."""
+
+from __future__ import annotations
+
+from dataclasses import replace
+from types import SimpleNamespace
+
+from custom_components.wakatime.entity import WakatimeEntity
+from custom_components.wakatime.snapshot import WakatimeSnapshot
+
+
+class CountingEntity(WakatimeEntity):
+    """Entity publishing the daily total and counting its state writes."""
+
+    writes = 0
+
+    @property
+    def state(self) -> int | None:
+        """Return the daily total of the snapshot."""
+        return self.coordinator.snapshot.daily_total
+
+    def async_write_ha_state(self) -> None:
+        """Count the write instead of publishing it."""
+        self.writes += 1
+
+
+def _entity() -> CountingEntity:
+    """Return an entity reading the summary of a coordinator stand-in."""
+    coordinator = SimpleNamespace(
+        entity_datasets={},
+        snapshot=WakatimeSnapshot(datasets=frozenset({"summary"}), daily_total=60),
+        changed_datasets={"summary"},
+        last_update_success=True,
+    )
+    description = SimpleNamespace(key="daily_total", dataset="summary")
+    return CountingEntity(coordinator, description, "entry")
+
+
+def test_first_refresh_writes() -> None:
+    """The first refresh publishes the state."""
+    entity = _entity()
+    entity._handle_coordinator_update()  # noqa: SLF001
+    assert entity.writes == 1
+
+
+def test_unchanged_refresh_writes_nothing() -> None:
+    """A refresh returning the same values does not write the state again."""
+    entity = _entity()
+    entity._handle_coordinator_update()  # noqa: SLF001
+    # The dataset was fetched again and re-extracted into an equal snapshot.
+    entity.coordinator.snapshot = replace(entity.coordinator.snapshot)
+    entity._handle_coordinator_update()  # noqa: SLF001
+    assert entity.writes == 1
+
+
+def test_changed_refresh_writes() -> None:
+    """A refresh changing the state writes it."""
+    entity = _entity()
+    entity._handle_coordinator_update()  # noqa: SLF001
+    entity.coordinator.snapshot = replace(entity.coordinator.snapshot, daily_total=120)
+    entity._handle_coordinator_update()  # noqa: SLF001
+    assert entity.writes == 2
+
+
+def test_availability_change_writes() -> None:
+    """Losing the dataset writes the unavailable state even if unchanged."""
+    entity = _entity()
+    entity._handle_coordinator_update()  # noqa: SLF001
+    entity.coordinator.changed_datasets = set()
+    entity.coordinator.snapshot = replace(
+        entity.coordinator.snapshot, datasets=frozenset()
+    )
+    entity._handle_coordinator_update()  # noqa: SLF001
+    assert entity.writes == 2
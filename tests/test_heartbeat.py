@@ -0,0 +1,46 @@
+"""Tests of the coding time counted from local heartbeats."""
+
+from __future__ import annotations
+
+from custom_components.wakatime.heartbeat import HeartbeatTracker
+
+# Noon UTC, so the heartbeats stay on one local day in any time zone near UTC.
+START = 1_700_000_000 - 1_700_000_000 % 86400 + 43200
+
+
+def _heartbeats(*offsets: int, entity: str = "a.py") -> list[dict]:
+    """Return heartbeat payloads sent the given seconds after START."""
+    return [{"time": START + offset, "entity": entity} for offset in offsets]
+
+
+def test_in_order() -> None:
+    """Gaps up to the timeout count, longer ones do not."""
+    tracker = HeartbeatTracker(timeout=900)
+    tracker.add(_heartbeats(0, 60, 120, 2000))
+    assert tracker.today_seconds == 120
+
+
+def test_late_heartbeat_counted() -> None:
+    """A late heartbeat splitting a long gap adds the time it bridges."""
+    tracker = HeartbeatTracker(timeout=900)
+    tracker.add(_heartbeats(0, 1200))
+    assert tracker.today_seconds == 0
+    tracker.add(_heartbeats(600, entity="b.py"))
+    assert tracker.today_seconds == 1200
+
+
+def test_retried_batch_not_counted_twice() -> None:
+    """Heartbeats already buffered are ignored."""
+    tracker = HeartbeatTracker(timeout=900)
+    batch = _heartbeats(0, 60, 120)
+    tracker.add(batch)
+    tracker.add(batch)
+    assert tracker.today_seconds == 120
+
+
+def test_late_heartbeat_before_buffer_ignored() -> None:
+    """A heartbeat older than the buffered ones of a full buffer is ignored."""
+    tracker = HeartbeatTracker(maxlen=2, timeout=900)
+    tracker.add(_heartbeats(100, 200, 300))
+    tracker.add(_heartbeats(0, entity="b.py"))
+    assert tracker.today_seconds == 200